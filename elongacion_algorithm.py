@@ -5,6 +5,7 @@ from qgis.core import (QgsProcessing, QgsProcessingAlgorithm,
                        QgsProcessingParameterVectorLayer,
                        QgsProcessingParameterBoolean,
                        QgsProcessingParameterVectorDestination,
+                       QgsProcessingParameterDefinition,
                        QgsProcessingException,
                        QgsProject, QgsVectorLayer, QgsFields, QgsField,
                        QgsFeature, QgsVectorFileWriter, QgsCoordinateReferenceSystem,
@@ -13,20 +14,651 @@ from qgis.core import (QgsProcessing, QgsProcessingAlgorithm,
                        QgsCategorizedSymbolRenderer, QgsSimpleMarkerSymbolLayer,
                        QgsLayoutManager, QgsLayout, QgsLayoutItemMap,
                        QgsLayoutItemLabel, QgsLayoutSize, QgsLayoutPoint,
-                       QgsLayoutItemPicture, QgsUnitTypes, QgsProcessingContext)
+                       QgsLayoutItemPicture, QgsUnitTypes, QgsProcessingContext,
+                       QgsPoint)
 from qgis.PyQt.QtCore import QVariant
 from qgis.PyQt.QtGui import QColor
 import processing
 import os
+import re
 import math
+import traceback
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Qt5Agg')
-import tempfile
+import string
+import json
+import bisect
+from html import escape
 from datetime import datetime
-import webbrowser
-from collections import defaultdict
+from types import MappingProxyType
+
+# Formatos de fecha de la marca de tiempo de cada ejecución
+_FORMATO_FECHA_ANALISIS = "%Y-%m-%d %H:%M:%S"
+_FORMATO_MARCA_ARCHIVO = '%Y%m%d_%H%M%S'
+_FORMATO_MARCA_CAPA = '%H%M%S'
+
+# Líneas separadoras del log (encabezado de ejecución y resumen de estadísticas)
+_SEPARADOR_ENCABEZADO = "=" * 70
+_SEPARADOR_ESTADISTICAS = "=" * 60
+
+# Clasificaciones de elongación según Schumm (1956), indexadas por CLASIF_ID
+_CLASIFICACIONES_ELONGACION = (
+    "Muy alargada",
+    "Alargada",
+    "Ligeramente alargada",
+    "Ni alargada ni ensanchada",
+    "Ligeramente ensanchada",
+    "Ensanchada",
+    "Muy ensanchada",
+    "Rodeando el desagüe"
+)
+# Las mismas clasificaciones ya escapadas para insertarlas en el HTML
+_CLASIFICACIONES_ELONGACION_HTML = tuple(escape(c) for c in _CLASIFICACIONES_ELONGACION)
+
+# Orden y colores de las clasificaciones en los gráficos del reporte
+_ORDEN_CLASIFICACIONES_GRAFICO = (
+    "Rodeando el desagüe",
+    "Muy ensanchada",
+    "Ensanchada",
+    "Ligeramente ensanchada",
+    "Ni alargada ni ensanchada",
+    "Ligeramente alargada",
+    "Alargada",
+    "Muy alargada"
+)
+_COLORES_GRAFICO = MappingProxyType({
+    "Muy alargada": "#8B0000",
+    "Alargada": "#DC143C",
+    "Ligeramente alargada": "#FF6347",
+    "Ni alargada ni ensanchada": "#FFD700",
+    "Ligeramente ensanchada": "#9ACD32",
+    "Ensanchada": "#32CD32",
+    "Muy ensanchada": "#1E90FF",
+    "Rodeando el desagüe": "#4169E1"
+})
+
+# Límites de clase del índice de elongación: los primeros son estrictos (<)
+# y los últimos inclusivos (<=), como en la tabla de Schumm del reporte
+_LIMITES_ELONGACION_ESTRICTOS = np.array([0.22, 0.30, 0.37, 0.45])
+_LIMITES_ELONGACION_INCLUSIVOS = np.array([0.60, 0.80, 1.20])
+
+# Número de features que se envían juntas a sink/writer con addFeatures
+_TAMANO_LOTE_ESCRITURA = 1000
+
+# Etiquetas abreviadas de las clasificaciones para los gráficos del reporte
+_ABREVIATURAS_CLASIFICACION = MappingProxyType({
+    "Ni alargada ni ensanchada": "Intermedia",
+    "Ligeramente alargada": "Lig. alargada",
+    "Ligeramente ensanchada": "Lig. ensanchada",
+    "Rodeando el desagüe": "Circular"
+})
+
+# Clasificación, etiqueta y color de cada serie de los gráficos, en orden,
+# resueltos una sola vez
+_SERIES_GRAFICO = tuple(
+    (c, _ABREVIATURAS_CLASIFICACION.get(c, c), _COLORES_GRAFICO.get(c, "#808080"))
+    for c in _ORDEN_CLASIFICACIONES_GRAFICO
+)
+
+# Colores de simbología por clasificación, en el mismo orden que CLASIF_ID;
+# se construyen una sola vez al importar el módulo
+_COLORES_CLASIFICACION = (
+    QColor(139, 0, 0),
+    QColor(255, 69, 0),
+    QColor(255, 140, 0),
+    QColor(255, 215, 0),
+    QColor(173, 255, 47),
+    QColor(0, 255, 127),
+    QColor(0, 191, 255),
+    QColor(30, 144, 255)
+)
+
+# Tabla de cuencas del reporte: encabezado, formato de fila y cierre fijos
+_ENCABEZADO_TABLA_CUENCAS = (
+    '<table class="tabla-cuencas">\n'
+    '<thead>\n<tr>\n'
+    '<th>Cuenca ID</th><th>Área</th><th>Distancia Máx</th><th>Índice Elongación</th>'
+    '<th>Clasificación</th><th>Puntos Analizados</th>\n'
+    '</tr>\n</thead>\n<tbody>\n'
+)
+_FILA_TABLA_CUENCAS = (
+    '<tr>\n'
+    '<td>Cuenca {0}</td>'
+    '<td>{1:.2f}</td>'
+    '<td>{2:.2f} m</td>'
+    '<td>{3:.4f}</td>'
+    '<td>{4}</td>'
+    '<td>{5}</td>'
+    '</tr>\n'
+)
+_PIE_TABLA_CUENCAS = '</tbody>\n</table>'
+
+# Textos de la interpretación automática del reporte de elongación
+_INTERPRETACION_ENCABEZADO = "<h3>Análisis Geomorfológico Automático:</h3><ul>"
+_INTERPRETACION_ALARGADAS = "<li><strong>Cuencas Predominantemente Alargadas:</strong> El índice promedio indica que las cuencas tienden a ser alargadas, característica de sistemas fluviales con control estructural fuerte o topografía montañosa pronunciada.</li>"
+_INTERPRETACION_INTERMEDIAS = "<li><strong>Cuencas de Forma Intermedia:</strong> El índice promedio sugiere cuencas con formas equilibradas, típicas de terrenos con topografía moderada y desarrollo fluvial maduro.</li>"
+_INTERPRETACION_ENSANCHADAS = "<li><strong>Cuencas Tendiendo a Ensanchadas:</strong> El índice promedio indica cuencas con tendencia al ensanchamiento, características de terrenos con pendientes suaves y control litológico horizontal.</li>"
+_INTERPRETACION_MUY_ENSANCHADAS = "<li><strong>Cuencas Muy Ensanchadas:</strong> El índice promedio sugiere cuencas muy ensanchadas, típicas de zonas con topografía muy suave o control estructural particular.</li>"
+# Límites del índice promedio (estrictos) y el texto de cada tramo, en el mismo orden
+_LIMITES_INTERPRETACION = (0.30, 0.45, 0.80)
+_TEXTOS_INTERPRETACION = (
+    _INTERPRETACION_ALARGADAS,
+    _INTERPRETACION_INTERMEDIAS,
+    _INTERPRETACION_ENSANCHADAS,
+    _INTERPRETACION_MUY_ENSANCHADAS
+)
+_INTERPRETACION_PREDOMINANTE = "<li><strong>Clasificación Predominante:</strong> {clasificacion} ({porcentaje:.1f}% de las cuencas), lo que sugiere un patrón geomorfológico dominante en la región de estudio.</li>"
+_RECOMENDACIONES_HTML = (
+    "</ul>"
+    "<h3>Recomendaciones:</h3><ul>"
+    "<li>Correlacionar los patrones de elongación con mapas geológicos para identificar controles litológicos.</li>"
+    "<li>Analizar la relación entre elongación y características hidrográficas (orden de corrientes, densidad de drenaje).</li>"
+    "<li>Considerar análisis complementarios de otros índices morfométricos para validación.</li>"
+    "</ul>"
+)
+
+# Script de los gráficos Plotly del reporte; los datos se insertan como un solo
+# objeto JSON ($$ escapa el signo de las plantillas literales de JavaScript)
+_PLANTILLA_GRAFICOS_JS = string.Template("""\
+var D = $datos;
+var clasificaciones_display = D.clasificaciones;
+var valores = D.valores;
+var porcentajes = D.porcentajes;
+var colores = D.colores;
+
+// Fuentes compartidas por ambos gráficos
+const FUENTE = 'Arial, sans-serif';
+const FUENTE_EJE = { family: FUENTE, size: 13 };
+
+// Barras horizontales (izquierda) y gráfico circular (derecha) en una sola
+// figura: un único layout y una única llamada a Plotly.newPlot
+var trace_barras = {
+    x: valores,
+    y: clasificaciones_display,
+    type: 'bar',
+    orientation: 'h',
+    marker: {
+        color: colores,
+        opacity: 0.85,
+        line: { color: '#2F2F2F', width: 1.2 }
+    },
+    text: valores.map((v, i) => `$${v} cuencas ($${porcentajes[i].toFixed(1)}%)`),
+    textposition: 'outside',
+    textfont: { family: FUENTE, size: 11, color: '#2F2F2F' },
+    name: 'Distribución Morfométrica',
+    showlegend: false
+};
+
+var trace_circular = {
+    labels: clasificaciones_display,
+    values: porcentajes,
+    type: 'pie',
+    domain: { x: [0.66, 1], y: [0, 0.9] },
+    marker: { colors: colores, line: { color: '#FFFFFF', width: 2 } },
+    textinfo: 'percent',
+    textposition: 'inside',
+    hole: 0.3,
+    sort: false
+};
+
+var layout = {
+    title: {
+        text: 'Distribución Morfométrica de Cuencas Hidrográficas<br><sub>Índice de Elongación según Schumm (1956)</sub>',
+        font: { family: 'Times New Roman, serif', size: 16, color: '#1f2937', weight: 'bold' },
+        x: 0.5, y: 0.95
+    },
+    xaxis: {
+        domain: [0, 0.55],
+        title: { text: 'Número de Cuencas', font: FUENTE_EJE },
+        showgrid: true, 
+        gridcolor: '#F3F4F6',
+        showline: true, 
+        linecolor: '#D1D5DB'
+    },
+    yaxis: {
+        title: { text: 'Clasificación Morfométrica', font: FUENTE_EJE },
+        showgrid: false, 
+        showline: true, 
+        linecolor: '#D1D5DB',
+        automargin: true
+    },
+    plot_bgcolor: 'white',
+    paper_bgcolor: 'white',
+    showlegend: true,
+    legend: { orientation: 'h', x: 0.66, y: -0.12 },
+    annotations: [{
+        text: 'Total:<br>$total_cuencas<br>cuencas',
+        showarrow: false, xref: 'paper', yref: 'paper', x: 0.83, y: 0.45
+    }],
+    margin: { l: 150, r: 40, t: 100, b: 80 }
+};
+
+Plotly.newPlot('grafico-distribucion', [trace_barras, trace_circular], layout);
+""")
+
+# Plotly: bundle local opcional distribuido con el plugin (reporte sin red);
+# si no está presente se usa del CDN la versión fija del paquete "basic" (scatter, bar, pie)
+_PLOTLY_LOCAL = os.path.join(os.path.dirname(__file__), 'resources', 'js', 'plotly.min.js')
+_PLOTLY_CDN = "https://cdn.plot.ly/plotly-basic-2.35.2.min.js"
+
+
+def _fuente_plotly():
+    """Devuelve la URL del script de Plotly: bundle local si existe, CDN en otro caso"""
+    if os.path.isfile(_PLOTLY_LOCAL):
+        return QUrl.fromLocalFile(_PLOTLY_LOCAL).toString()
+    return _PLOTLY_CDN
+
+
+# Minificación del CSS embebido en los reportes, hecha una vez al importar
+_RE_COMENTARIOS_CSS = re.compile(r'/\*.*?\*/', re.S)
+_RE_ESPACIOS_CSS = re.compile(r'\s+')
+_RE_SEPARADORES_CSS = re.compile(r'\s*([{};:,])\s*')
+_RE_BLOQUE_ESTILOS = re.compile(r'(<style>)(.*?)(</style>)', re.S)
+
+
+def _minificar_estilos(html):
+    """Compacta el CSS de los bloques <style> (sin comentarios ni espacios sobrantes)"""
+    def compactar(m):
+        css = _RE_ESPACIOS_CSS.sub(' ', _RE_COMENTARIOS_CSS.sub('', m.group(2)))
+        css = _RE_SEPARADORES_CSS.sub(r'\1', css).replace(';}', '}')
+        return m.group(1) + css.strip() + m.group(3)
+    return _RE_BLOQUE_ESTILOS.sub(compactar, html)
+
+
+# Plantilla del reporte HTML de elongación; se analiza una sola vez al importar
+# el módulo y en cada reporte solo se sustituyen los valores dinámicos. Se divide
+# donde va la tabla de cuencas para escribir el reporte por partes. El CSS se
+# minifica en ese mismo momento
+_PLANTILLA_REPORTE_HTML_INICIO, _PLANTILLA_REPORTE_HTML_FIN = (string.Template(parte) for parte in _minificar_estilos("""
+<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Reporte Elongación V2.0 - UTPL</title>
+    <script src="$plotly_src"></script>
+    <style>
+        * { box-sizing: border-box; }
+        body {
+            font-family: 'Segoe UI', 'Helvetica Neue', Arial, sans-serif;
+            line-height: 1.6;
+            margin: 0;
+            padding: 20px;
+            background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
+            color: #1a202c;
+        }
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background: white;
+            padding: 40px;
+            border-radius: 12px;
+            box-shadow: 0 10px 25px rgba(0,0,0,0.08);
+            border: 1px solid #e2e8f0;
+        }
+        .header {
+            text-align: center;
+            border-bottom: 3px solid #2d3748;
+            padding-bottom: 25px;
+            margin-bottom: 35px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            margin: -40px -40px 35px -40px;
+            padding: 40px 40px 25px 40px;
+            border-radius: 12px 12px 0 0;
+            color: white;
+        }
+        .header h1 {
+            margin: 0;
+            font-size: 2.8em;
+            font-weight: 700;
+            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+            font-family: 'Times New Roman', serif;
+        }
+        .header p {
+            margin: 10px 0 5px 0;
+            font-size: 1.1em;
+            opacity: 0.95;
+        }
+        .version-badge {
+            background: linear-gradient(135deg, #48bb78 0%, #38a169 100%);
+            color: white;
+            padding: 8px 20px;
+            border-radius: 25px;
+            font-size: 0.9em;
+            font-weight: 600;
+            display: inline-block;
+            margin-top: 15px;
+            box-shadow: 0 4px 8px rgba(0,0,0,0.2);
+        }
+        .section {
+            margin: 35px 0;
+            padding: 25px;
+            background: #f8fafc;
+            border-radius: 10px;
+            border-left: 5px solid #4299e1;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.04);
+        }
+        .section h2 {
+            color: #2d3748;
+            margin-top: 0;
+            font-size: 1.6em;
+            font-weight: 600;
+            display: flex;
+            align-items: center;
+            gap: 10px;
+        }
+        .stats-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
+            gap: 20px;
+            margin: 25px 0;
+        }
+        .stat-card {
+            background: white;
+            padding: 25px;
+            border-radius: 10px;
+            border-left: 5px solid #48bb78;
+            box-shadow: 0 4px 6px rgba(0,0,0,0.05);
+            transition: transform 0.2s ease, box-shadow 0.2s ease;
+        }
+        .stat-card:hover {
+            transform: translateY(-2px);
+            box-shadow: 0 8px 15px rgba(0,0,0,0.1);
+        }
+        .stat-value {
+            font-size: 2.2em;
+            font-weight: 700;
+            color: #2d3748;
+            margin: 0;
+            font-family: 'Arial', sans-serif;
+        }
+        .stat-label {
+            color: #718096;
+            margin: 8px 0 0 0;
+            font-size: 0.95em;
+            font-weight: 500;
+            text-transform: uppercase;
+            letter-spacing: 0.5px;
+        }
+        .tabla-cuencas {
+            width: 100%;
+            border-collapse: collapse;
+            margin: 25px 0;
+            font-size: 0.9em;
+            background: white;
+            border-radius: 8px;
+            overflow: hidden;
+            box-shadow: 0 4px 6px rgba(0,0,0,0.05);
+        }
+        .tabla-cuencas th {
+            background: linear-gradient(135deg, #4a5568 0%, #2d3748 100%);
+            color: white;
+            font-weight: 600;
+            padding: 15px 12px;
+            text-align: left;
+            font-size: 0.85em;
+            text-transform: uppercase;
+            letter-spacing: 0.5px;
+        }
+        .tabla-cuencas td {
+            padding: 12px;
+            border-bottom: 1px solid #e2e8f0;
+        }
+        .tabla-cuencas tr:nth-child(even) {
+            background-color: #f7fafc;
+        }
+        .tabla-cuencas tr:hover {
+            background-color: #edf2f7;
+        }
+        .tabla-cuencas tbody tr {
+            content-visibility: auto;
+            contain-intrinsic-size: auto 45px;
+        }
+        .grafico-container {
+            margin: 30px 0;
+            padding: 25px;
+            background: white;
+            border-radius: 10px;
+            box-shadow: 0 4px 6px rgba(0,0,0,0.05);
+            border: 1px solid #e2e8f0;
+        }
+        .footer {
+            text-align: center;
+            margin-top: 50px;
+            padding-top: 30px;
+            border-top: 2px solid #e2e8f0;
+            color: #718096;
+            background: #f8fafc;
+            margin-left: -40px;
+            margin-right: -40px;
+            margin-bottom: -40px;
+            padding-left: 40px;
+            padding-right: 40px;
+            padding-bottom: 30px;
+            border-radius: 0 0 12px 12px;
+        }
+        .footer p {
+            margin: 8px 0;
+        }
+        .interpretacion {
+            background: linear-gradient(135deg, #e6fffa 0%, #b2f5ea 100%);
+            padding: 25px;
+            border-radius: 10px;
+            border-left: 5px solid #38b2ac;
+            margin: 25px 0;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.04);
+        }
+        .interpretacion h3 {
+            color: #234e52;
+            margin-top: 0;
+            font-size: 1.3em;
+        }
+        .interpretacion ul {
+            color: #2c7a7b;
+            line-height: 1.8;
+        }
+        .interpretacion li {
+            margin-bottom: 8px;
+        }
+        @media print {
+            body { background: white; }
+            .container { box-shadow: none; }
+            .header { background: #2d3748 !important; }
+        }
+        @media (max-width: 768px) {
+            .container { padding: 20px; margin: 10px; }
+            .header { margin: -20px -20px 25px -20px; padding: 30px 20px 20px 20px; }
+            .header h1 { font-size: 2.2em; }
+            .stats-grid { grid-template-columns: 1fr; }
+            .tabla-cuencas { font-size: 0.8em; }
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Análisis de Elongación de Cuencas</h1>
+            <div class="version-badge">Versión 2.0 Interactiva</div>
+            <p>Universidad Técnica Particular de Loja - UTPL</p>
+            <p>Fecha de análisis: $fecha_analisis</p>
+        </div>
+
+        <div class="section">
+            <h2>📊 Resumen Ejecutivo</h2>
+            <div class="stats-grid">
+                <div class="stat-card">
+                    <p class="stat-value">$total_cuencas</p>
+                    <p class="stat-label">Total de Cuencas Analizadas</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$area_total</p>
+                    <p class="stat-label">Área Total Analizada</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$indice_promedio</p>
+                    <p class="stat-label">Índice de Elongación Promedio</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$clasificacion_predominante</p>
+                    <p class="stat-label">Clasificación Predominante</p>
+                </div>
+            </div>
+        </div>
+
+        <div class="section">
+            <h2>📈 Análisis Morfométrico de Cuencas</h2>
+            <div class="grafico-container">
+                <div id="grafico-distribucion" style="width:100%;height:600px;"></div>
+            </div>
+            <p style="text-align: center; margin-top: 20px; color: #666; font-style: italic;">
+                <strong>Nota metodológica:</strong> Clasificación basada en Schumm (1956) mediante el índice Re = Diámetro equivalente / Distancia máxima.<br>
+                El análisis considera la relación área-forma para caracterización geomorfológica de cuencas hidrográficas.
+            </p>
+        </div>
+
+        <div class="section">
+            <h2>📋 Estadísticas Detalladas</h2>
+            <div class="stats-grid">
+                <div class="stat-card">
+                    <p class="stat-value">$indice_maximo</p>
+                    <p class="stat-label">Índice Máximo</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$indice_minimo</p>
+                    <p class="stat-label">Índice Mínimo</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$indice_mediana</p>
+                    <p class="stat-label">Mediana</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$indice_desviacion</p>
+                    <p class="stat-label">Desviación Estándar</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$area_maxima</p>
+                    <p class="stat-label">Área Máxima de Cuenca</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$distancia_maxima m</p>
+                    <p class="stat-label">Distancia Máxima</p>
+                </div>
+            </div>
+        </div>
+
+        <div class="section">
+            <h2>📊 Detalle por Cuencas</h2>
+            $tabla_cuencas
+        </div>
+
+        <div class="section">
+            <h2>📏 Tabla de Clasificación de Elongación</h2>
+            <p><strong>Clasificación según Schumm (1956):</strong></p>
+            <table class="tabla-cuencas" style="margin-top: 15px;">
+                <thead>
+                    <tr>
+                        <th>Clasificación</th>
+                        <th>Rango del Índice (Re)</th>
+                        <th>Descripción Morfológica</th>
+                        <th>Características</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    <tr>
+                        <td><strong>Muy alargada</strong></td>
+                        <td>Re &lt; 0.22</td>
+                        <td>Forma muy estrecha y alargada</td>
+                        <td>Cuencas con control estructural fuerte</td>
+                    </tr>
+                    <tr>
+                        <td><strong>Alargada</strong></td>
+                        <td>0.22 ≤ Re &lt; 0.30</td>
+                        <td>Forma alargada</td>
+                        <td>Topografía montañosa pronunciada</td>
+                    </tr>
+                    <tr>
+                        <td><strong>Ligeramente alargada</strong></td>
+                        <td>0.30 ≤ Re &lt; 0.37</td>
+                        <td>Tendencia alargada</td>
+                        <td>Desarrollo fluvial en terrenos inclinados</td>
+                    </tr>
+                    <tr>
+                        <td><strong>Intermedia</strong></td>
+                        <td>0.37 ≤ Re &lt; 0.45</td>
+                        <td>Forma equilibrada</td>
+                        <td>Topografía moderada, desarrollo maduro</td>
+                    </tr>
+                    <tr>
+                        <td><strong>Ligeramente ensanchada</strong></td>
+                        <td>0.45 ≤ Re ≤ 0.60</td>
+                        <td>Tendencia ensanchada</td>
+                        <td>Pendientes suaves, erosión moderada</td>
+                    </tr>
+                    <tr>
+                        <td><strong>Ensanchada</strong></td>
+                        <td>0.60 &lt; Re ≤ 0.80</td>
+                        <td>Forma ensanchada</td>
+                        <td>Control litológico horizontal</td>
+                    </tr>
+                    <tr>
+                        <td><strong>Muy ensanchada</strong></td>
+                        <td>0.80 &lt; Re ≤ 1.20</td>
+                        <td>Forma muy ancha</td>
+                        <td>Topografía muy suave</td>
+                    </tr>
+                    <tr>
+                        <td><strong>Circular</strong></td>
+                        <td>Re &gt; 1.20</td>
+                        <td>Forma tendiendo a circular</td>
+                        <td>Cuencas rodeando el punto de desagüe</td>
+                    </tr>
+                </tbody>
+            </table>
+            <p style="margin-top: 15px; font-style: italic; color: #666;">
+                <strong>Nota:</strong> Re = Índice de elongación = Diámetro equivalente / Distancia máxima<br>
+                Donde: Diámetro equivalente = 2√(Área/π)
+            </p>
+        </div>
+
+        <div class="section">
+            <h2>💡 Interpretación Geomorfológica</h2>
+            <div class="interpretacion">
+                $interpretacion
+            </div>
+        </div>
+
+        <div class="footer">
+            <p><strong>Reporte generado automáticamente por el Plugin de Índices Morfológicos V2.0</strong></p>
+            <p>Universidad Técnica Particular de Loja - Departamento de Ingeniería Civil</p>
+            <p>Desarrollado por: Santiago Quiñones - Docente Investigador</p>
+        </div>
+    </div>
+
+    <script>
+        $grafico_datos
+    </script>
+</body>
+</html>
+""").split("$tabla_cuencas"))
+
+
+class _ParametroDestinoGeoPackage(QgsProcessingParameterVectorDestination):
+    """Destino vectorial que solo ofrece GeoPackage como formato de salida"""
+    
+    def clone(self):
+        copia = _ParametroDestinoGeoPackage(
+            self.name(), self.description(), self.dataType(), self.defaultValue(),
+            bool(self.flags() & QgsProcessingParameterDefinition.FlagOptional),
+            self.createByDefault()
+        )
+        copia.setFlags(self.flags())
+        return copia
+    
+    def defaultFileExtension(self):
+        return 'gpkg'
+    
+    def supportedOutputVectorLayerExtensions(self):
+        return ['gpkg']
+
 
 class ElongacionAlgorithm(QgsProcessingAlgorithm):
     INPUT_CUENCAS = 'INPUT_CUENCAS'
@@ -64,11 +696,11 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
             )
         )
         
-        # Archivo de salida shapefile
+        # Archivo de salida GeoPackage
         self.addParameter(
-            QgsProcessingParameterVectorDestination(
+            _ParametroDestinoGeoPackage(
                 self.OUTPUT_SHAPEFILE,
-                self.tr('Archivo shapefile de salida'),
+                self.tr('Archivo GeoPackage de salida'),
                 type=QgsProcessing.TypeVectorPolygon,
                 optional=True,
                 defaultValue=None
@@ -77,9 +709,12 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
     
     def processAlgorithm(self, parameters, context, feedback):
         # ===== MARCADORES DE VERSIÓN =====
-        feedback.pushInfo("=" * 70)
+        feedback.pushInfo(_SEPARADOR_ENCABEZADO)
         feedback.pushInfo("🚀 EJECUTANDO ELONGACIÓN VERSIÓN 2.0 - ANÁLISIS GEOMORFOLÓGICO QGIS")
-        feedback.pushInfo("=" * 70)
+        feedback.pushInfo(_SEPARADOR_ENCABEZADO)
+        
+        # Marca de tiempo única de la ejecución (nombre de capa, estadísticas y reporte)
+        inicio = datetime.now()
         
         try:
             # Obtener parámetros
@@ -88,6 +723,12 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
             generar_html = self.parameterAsBool(parameters, self.GENERAR_HTML, context)
             output_shapefile = self.parameterAsOutputLayer(parameters, self.OUTPUT_SHAPEFILE, context)
             
+            # La salida se escribe siempre con el driver GPKG; la ruta no se modifica
+            if output_shapefile and not output_shapefile.lower().endswith('.gpkg'):
+                raise QgsProcessingException(
+                    self.tr("El archivo de salida debe ser un GeoPackage (.gpkg)")
+                )
+            
             feedback.pushInfo("✅ Parámetros obtenidos correctamente")
             
             # Validar capas
@@ -120,50 +761,49 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
             datos_cuencas = self._leer_datos_cuencas(cuencas_layer, campo_area, feedback)
             datos_puntos = self._leer_datos_puntos(puntos_layer, campo_x, campo_y, campo_z, feedback)
             
-            if not datos_cuencas or not datos_puntos:
+            if not datos_cuencas or datos_puntos[0].size == 0:
                 raise QgsProcessingException(self.tr("No se encontraron datos válidos para procesar"))
             
             # Agrupar puntos por cuenca y encontrar extremos
             feedback.pushInfo("🔍 Agrupando puntos por cuenca y encontrando extremos...")
-            cuencas_con_puntos = self._agrupar_puntos_por_cuenca(datos_cuencas, datos_puntos, feedback)
+            cuencas_con_puntos = self._agrupar_puntos_por_cuenca(cuencas_layer, datos_cuencas, datos_puntos, feedback)
             
             if not cuencas_con_puntos:
                 raise QgsProcessingException(self.tr("No se pudieron asociar puntos con cuencas"))
             
             # Calcular índices de elongación
             feedback.pushInfo("📐 Calculando índices de elongación...")
-            resultados_elongacion = self._calcular_elongacion_todas_cuencas(cuencas_con_puntos, feedback)
+            resultados_elongacion = self._calcular_elongacion_todas_cuencas(cuencas_con_puntos, datos_puntos, feedback)
             
             # Crear nueva capa de salida
             feedback.pushInfo("🔧 Creando nueva capa con resultados...")
             output_path = self._crear_capa_elongacion(
-                cuencas_layer, resultados_elongacion, output_shapefile, context, feedback
+                cuencas_layer, resultados_elongacion, output_shapefile, parameters, context, feedback, inicio
             )
             
             # Calcular estadísticas
-            estadisticas = self._calcular_estadisticas_elongacion(resultados_elongacion, feedback)
+            estadisticas = self._calcular_estadisticas_elongacion(resultados_elongacion, feedback, inicio)
             
             # Generar reporte HTML si se solicita
             if generar_html:
                 feedback.pushInfo("📄 Generando reporte HTML interactivo...")
                 self._generar_reporte_html_elongacion(
-                    resultados_elongacion, estadisticas, feedback
+                    resultados_elongacion, estadisticas, feedback, inicio
                 )
             
             # Mostrar estadísticas en log
             self._mostrar_estadisticas_log(estadisticas, feedback)
             
-            feedback.pushInfo("=" * 70)
+            feedback.pushInfo(_SEPARADOR_ENCABEZADO)
             feedback.pushInfo("🎉 ELONGACIÓN V2.0 - PROCESAMIENTO COMPLETADO EXITOSAMENTE")
             feedback.pushInfo(f"📊 Cuencas procesadas: {len(resultados_elongacion)}")
             feedback.pushInfo(f"📁 Archivo de salida: {output_path}")
-            feedback.pushInfo("=" * 70)
+            feedback.pushInfo(_SEPARADOR_ENCABEZADO)
             
             return {self.OUTPUT_SHAPEFILE: output_path}
             
         except Exception as e:
             feedback.reportError(f"❌ Error durante el procesamiento: {str(e)}")
-            import traceback
             feedback.pushInfo(f"🔧 DEBUG: Traceback: {traceback.format_exc()}")
             return {}
     
@@ -192,22 +832,22 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
         return None
     
     def _leer_datos_cuencas(self, layer, campo_area, feedback):
-        """Lee los datos de las cuencas con sus áreas"""
+        """Lee las áreas de las cuencas válidas, indexadas por id de feature"""
         datos_cuencas = {}
+        ia = layer.fields().indexOf(campo_area)
+        
+        # Solo se lee el campo de área; la geometría se obtiene al agrupar
+        solicitud = QgsFeatureRequest().setSubsetOfAttributes([ia]).setFlags(QgsFeatureRequest.NoGeometry)
         
-        for feature in layer.getFeatures():
+        for feature in layer.getFeatures(solicitud):
             try:
-                area_val = feature[campo_area]
+                area_val = feature.attributes()[ia]
                 if area_val is None or area_val <= 0:
                     continue
                 
                 area = float(area_val)
                 
-                datos_cuencas[area] = {
-                    'feature': feature,
-                    'area': area,
-                    'geometry': feature.geometry()
-                }
+                datos_cuencas[feature.id()] = area
                 
             except (ValueError, TypeError) as e:
                 feedback.pushWarning(f"Error leyendo cuenca {feature.id()}: {e}")
@@ -217,158 +857,174 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
         return datos_cuencas
     
     def _leer_datos_puntos(self, layer, campo_x, campo_y, campo_z, feedback):
-        """Lee los puntos con sus coordenadas"""
-        puntos = []
-        
-        for feature in layer.getFeatures():
+        """Lee los puntos con sus coordenadas como arreglos NumPy (xs, ys, zs)"""
+        # Arreglos reservados de una vez con el número de features de la capa;
+        # solo se amplían si el proveedor informa un conteo menor al real
+        capacidad = max(layer.featureCount(), 1)
+        xs, ys, zs = (np.empty(capacidad, dtype=np.float64) for _ in range(3))
+        k = 0
+        ix, iy, iz = (layer.fields().indexOf(n) for n in (campo_x, campo_y, campo_z))
+        
+        # Solo se leen los campos X/Y/Z, sin geometría
+        solicitud = QgsFeatureRequest().setSubsetOfAttributes([ix, iy, iz]).setFlags(QgsFeatureRequest.NoGeometry)
+        
+        for feature in layer.getFeatures(solicitud):
             try:
-                x_val = feature[campo_x]
-                y_val = feature[campo_y]
-                z_val = feature[campo_z]
-                
-                if any(val is None for val in [x_val, y_val, z_val]):
-                    continue
-                
-                x = float(x_val)
-                y = float(y_val)
-                z = float(z_val)
+                attrs = feature.attributes()
+                x_val, y_val, z_val = attrs[ix], attrs[iy], attrs[iz]
                 
-                if not all(math.isfinite(val) for val in [x, y, z]):
-                    continue
-                
-                puntos.append({
-                    'x': x, 'y': y, 'z': z,
-                    'feature': feature,
-                    'geometry': feature.geometry()
-                })
+                # Los nulos se guardan como NaN y se descartan al final junto
+                # con los no finitos; NumPy hace la conversión a float
+                if k == len(xs):
+                    xs, ys, zs = (np.concatenate((a, np.empty_like(a))) for a in (xs, ys, zs))
+                xs[k] = np.nan if x_val is None else x_val
+                ys[k] = np.nan if y_val is None else y_val
+                zs[k] = np.nan if z_val is None else z_val
+                k += 1
                 
             except (ValueError, TypeError) as e:
                 feedback.pushWarning(f"Error leyendo punto {feature.id()}: {e}")
                 continue
         
-        feedback.pushInfo(f"V2.0: {len(puntos)} puntos válidos encontrados")
-        return puntos
+        xs, ys, zs = xs[:k], ys[:k], zs[:k]
+        validos = np.isfinite(xs) & np.isfinite(ys) & np.isfinite(zs)
+        
+        feedback.pushInfo(f"V2.0: {int(np.count_nonzero(validos))} puntos válidos encontrados")
+        return xs[validos], ys[validos], zs[validos]
     
-    def _agrupar_puntos_por_cuenca(self, datos_cuencas, datos_puntos, feedback):
+    def _agrupar_puntos_por_cuenca(self, cuencas_layer, datos_cuencas, datos_puntos, feedback):
         """Agrupa puntos por cuenca y encuentra extremos de elevación"""
         cuencas_con_puntos = {}
-        
-        for area, datos_cuenca in datos_cuencas.items():
-            cuenca_geom = datos_cuenca['geometry']
+        xs, ys, zs = datos_puntos
+        
+        # Puntos ordenados por X una sola vez: el rango X de cada cuenca se
+        # localiza con búsqueda binaria en lugar de recorrer todos los puntos
+        orden_x = np.argsort(xs, kind='stable')
+        xs_ordenadas = xs[orden_x]
+        
+        # Las geometrías se leen en flujo (una cuenca a la vez) en lugar de
+        # mantener todos los polígonos en memoria desde la lectura inicial
+        solicitud = QgsFeatureRequest().setFilterFids(list(datos_cuencas)).setNoAttributes()
+        for feature in cuencas_layer.getFeatures(solicitud):
+            fid = feature.id()
+            area = datos_cuencas[fid]
+            cuenca_geom = feature.geometry()
             puntos_en_cuenca = []
             
-            # Encontrar puntos dentro de cada cuenca
-            for punto in datos_puntos:
-                punto_geom = punto['geometry']
-                if cuenca_geom.contains(punto_geom) or cuenca_geom.intersects(punto_geom):
-                    puntos_en_cuenca.append(punto)
+            # Prefiltro por rectángulo envolvente: rango X por búsqueda binaria y
+            # prueba Y vectorizada solo sobre ese rango; los candidatos vuelven al
+            # orden original para que los empates se resuelvan igual
+            bbox = cuenca_geom.boundingBox()
+            inicio_x = np.searchsorted(xs_ordenadas, bbox.xMinimum(), side='left')
+            fin_x = np.searchsorted(xs_ordenadas, bbox.xMaximum(), side='right')
+            en_rango_x = orden_x[inicio_x:fin_x]
+            y_rango = ys[en_rango_x]
+            candidatos = np.sort(en_rango_x[(y_rango >= bbox.yMinimum()) & (y_rango <= bbox.yMaximum())])
+            
+            # Prueba exacta con la geometría de la cuenca preparada una vez
+            if candidatos.size and not cuenca_geom.isNull():
+                motor = QgsGeometry.createGeometryEngine(cuenca_geom.constGet())
+                motor.prepareGeometry()
+                for i, x, y in zip(candidatos.tolist(), xs[candidatos].tolist(), ys[candidatos].tolist()):
+                    punto = QgsPoint(x, y)
+                    # Para un punto, intersects ya incluye contains (interior + borde)
+                    if motor.intersects(punto):
+                        puntos_en_cuenca.append(i)
             
             if len(puntos_en_cuenca) < 2:
-                feedback.pushWarning(f"Cuenca {area:.2f} tiene menos de 2 puntos, saltando...")
+                feedback.pushWarning(f"Cuenca {fid} (área {area:.2f}) tiene menos de 2 puntos, saltando...")
                 continue
             
-            # Encontrar puntos de máxima y mínima elevación
-            punto_max = max(puntos_en_cuenca, key=lambda p: p['z'])
-            punto_min = min(puntos_en_cuenca, key=lambda p: p['z'])
-            
-            # Manejar duplicados - seleccionar por coordenada X máxima/mínima
-            puntos_z_max = [p for p in puntos_en_cuenca if abs(p['z'] - punto_max['z']) < 1e-6]
-            puntos_z_min = [p for p in puntos_en_cuenca if abs(p['z'] - punto_min['z']) < 1e-6]
+            # Puntos de máxima y mínima elevación
+            i_max, i_min = self._indices_extremos(np.array(puntos_en_cuenca), xs, zs)
             
-            if len(puntos_z_max) > 1:
-                punto_max = max(puntos_z_max, key=lambda p: p['x'])
-            else:
-                punto_max = puntos_z_max[0]
-            
-            if len(puntos_z_min) > 1:
-                punto_min = min(puntos_z_min, key=lambda p: p['x'])
-            else:
-                punto_min = puntos_z_min[0]
-            
-            cuencas_con_puntos[area] = {
-                'cuenca': datos_cuenca,
-                'punto_max': punto_max,
-                'punto_min': punto_min,
+            cuencas_con_puntos[fid] = {
+                'area': area,
+                'i_max': i_max,
+                'i_min': i_min,
                 'total_puntos': len(puntos_en_cuenca)
             }
         
         feedback.pushInfo(f"V2.0: {len(cuencas_con_puntos)} cuencas con puntos válidos")
         return cuencas_con_puntos
     
-    def _calcular_elongacion_todas_cuencas(self, cuencas_con_puntos, feedback):
+    def _indices_extremos(self, sel, xs, zs):
+        """Índices de los puntos de máxima y mínima elevación entre los seleccionados;
+        los empates (±1e-6) se resuelven por coordenada X máxima/mínima"""
+        # Z y X se extraen una sola vez; los empates se enmascaran con ±inf
+        # en lugar de extraer subconjuntos
+        z = zs[sel]
+        x = xs[sel]
+        i_max = np.argmax(np.where((z.max() - z) < 1e-6, x, -np.inf))
+        i_min = np.argmin(np.where((z - z.min()) < 1e-6, x, np.inf))
+        return sel[i_max], sel[i_min]
+    
+    def _calcular_elongacion_todas_cuencas(self, cuencas_con_puntos, datos_puntos, feedback):
         """Calcula índices de elongación para todas las cuencas"""
         resultados = []
         
-        for area, datos in cuencas_con_puntos.items():
+        # Coordenadas extremas y áreas como arreglos para calcular todas las cuencas
+        # a la vez; los extremos se toman de los arreglos de puntos por índice
+        xs, ys, zs = datos_puntos
+        datos_lista = list(cuencas_con_puntos.values())
+        n = len(datos_lista)
+        i_max = np.fromiter((d['i_max'] for d in datos_lista), dtype=np.intp, count=n)
+        i_min = np.fromiter((d['i_min'] for d in datos_lista), dtype=np.intp, count=n)
+        pmax = np.column_stack((xs[i_max], ys[i_max], zs[i_max]))
+        pmin = np.column_stack((xs[i_min], ys[i_min], zs[i_min]))
+        areas = np.fromiter((d['area'] for d in datos_lista), dtype=np.float64, count=n)
+        
+        # Distancia 3D entre puntos extremos (suma de cuadrados fusionada con einsum)
+        delta = pmax - pmin
+        distancias = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+        
+        # Diámetro equivalente del círculo (multiplicación por 1/π en lugar de división)
+        diametros = 2 * np.sqrt(areas * (1 / np.pi))
+        
+        # Índice de elongación (0 si la distancia es nula) y su clasificación
+        indices = np.divide(diametros, distancias, out=np.zeros_like(diametros), where=distancias > 0)
+        clasificaciones_id = self._clasificar_elongacion(indices)
+        
+        for (fid, datos), punto_max, punto_min, distancia_max, diametro_equivalente, indice_elongacion, clasificacion_id in zip(
+                cuencas_con_puntos.items(), pmax.tolist(), pmin.tolist(), distancias.tolist(),
+                diametros.tolist(), indices.tolist(), clasificaciones_id.tolist()):
             try:
-                cuenca = datos['cuenca']
-                punto_max = datos['punto_max']
-                punto_min = datos['punto_min']
-                
-                # Calcular distancia 3D entre puntos extremos
-                dx = punto_max['x'] - punto_min['x']
-                dy = punto_max['y'] - punto_min['y']
-                dz = punto_max['z'] - punto_min['z']
-                
-                distancia_max = math.sqrt(dx**2 + dy**2 + dz**2)
-                
-                # Calcular diámetro equivalente del círculo
-                diametro_equivalente = 2 * math.sqrt(area / math.pi)
-                
-                # Calcular índice de elongación
-                if distancia_max > 0:
-                    indice_elongacion = diametro_equivalente / distancia_max
-                else:
-                    indice_elongacion = 0.0
-                
-                # Clasificar elongación
-                clasificacion = self._clasificar_elongacion(indice_elongacion)
+                clasificacion = _CLASIFICACIONES_ELONGACION[clasificacion_id]
                 
                 resultado = {
-                    'area': area,
-                    'feature': cuenca['feature'],
-                    'punto_min_x': punto_min['x'],
-                    'punto_min_y': punto_min['y'],
-                    'punto_min_z': punto_min['z'],
-                    'punto_max_x': punto_max['x'],
-                    'punto_max_y': punto_max['y'],
-                    'punto_max_z': punto_max['z'],
+                    'fid': fid,
+                    'area': datos['area'],
+                    'punto_min_x': punto_min[0],
+                    'punto_min_y': punto_min[1],
+                    'punto_min_z': punto_min[2],
+                    'punto_max_x': punto_max[0],
+                    'punto_max_y': punto_max[1],
+                    'punto_max_z': punto_max[2],
                     'distancia_max': distancia_max,
                     'diametro_equivalente': diametro_equivalente,
                     'indice_elongacion': indice_elongacion,
                     'clasificacion': clasificacion,
+                    'clasificacion_id': clasificacion_id,
                     'total_puntos': datos['total_puntos']
                 }
                 
                 resultados.append(resultado)
                 
             except Exception as e:
-                feedback.pushWarning(f"Error calculando elongación para cuenca {area}: {e}")
+                feedback.pushWarning(f"Error calculando elongación para cuenca {fid}: {e}")
                 continue
         
         feedback.pushInfo(f"V2.0: Cálculos completados para {len(resultados)} cuencas")
         return resultados
     
-    def _clasificar_elongacion(self, indice):
-        """Clasifica el índice de elongación según rangos estándar"""
-        if indice < 0.22:
-            return "Muy alargada"
-        elif indice < 0.30:
-            return "Alargada"
-        elif indice < 0.37:
-            return "Ligeramente alargada"
-        elif indice < 0.45:
-            return "Ni alargada ni ensanchada"
-        elif indice <= 0.60:
-            return "Ligeramente ensanchada"
-        elif indice <= 0.80:
-            return "Ensanchada"
-        elif indice <= 1.20:
-            return "Muy ensanchada"
-        else:
-            return "Rodeando el desagüe"
+    def _clasificar_elongacion(self, indices):
+        """Clasifica los índices de elongación según rangos estándar (devuelve CLASIF_ID)"""
+        # Límites hasta 0.45 excluyen el valor (<) y desde 0.60 lo incluyen (<=):
+        # cada arreglo se busca con el lado que reproduce esa comparación
+        return (np.searchsorted(_LIMITES_ELONGACION_ESTRICTOS, indices, side='right') +
+                np.searchsorted(_LIMITES_ELONGACION_INCLUSIVOS, indices, side='left'))
     
-    def _crear_capa_elongacion(self, input_layer, resultados, output_shapefile, context, feedback):
+    def _crear_capa_elongacion(self, input_layer, resultados, output_shapefile, parameters, context, feedback, inicio):
         """Crea nueva capa independiente con resultados de elongación"""
         # Crear campos de salida - PRESERVAR TODOS LOS CAMPOS ORIGINALES
         fields = QgsFields(input_layer.fields())
@@ -385,6 +1041,7 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
             ("DIAMETRO_EQ", QVariant.Double, "double", 20, 2),
             ("VALOR_ELON", QVariant.Double, "double", 20, 6),
             ("CLASIF_ELON", QVariant.String, "string", 50, 0),
+            ("CLASIF_ID", QVariant.Int, "integer", 2, 0),
             ("AREA_CUENCA", QVariant.Double, "double", 20, 2),
             ("NUM_PUNTOS", QVariant.Int, "integer", 10, 0)
         ]
@@ -392,22 +1049,18 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
         for nombre, tipo, tipo_str, longitud, precision in campos_elongacion:
             fields.append(QgsField(nombre, tipo, tipo_str, longitud, precision))
         
+        # Posición de cada campo calculado en la capa de salida (resuelta una vez)
+        indices_calculados = [fields.indexOf(nombre) for nombre, *_ in campos_elongacion]
+        
+        # Features originales de las cuencas con resultado, por id
+        originales = self._obtener_features_originales(input_layer, resultados)
+        
         # Determinar ubicación y formato de salida
         if output_shapefile:
+            # Siempre GeoPackage: sin límite de 2 GB, sin truncar nombres de campo
+            # y con todas las inserciones en una sola transacción
             output_path = output_shapefile
-            # Detectar formato por extensión
-            if output_path.lower().endswith('.gpkg'):
-                driver_name = "GPKG"
-                feedback.pushInfo(f"📁 V2.0: Creando GeoPackage en: {output_path}")
-            elif output_path.lower().endswith('.shp'):
-                driver_name = "ESRI Shapefile"
-                feedback.pushInfo(f"📁 V2.0: Creando Shapefile en: {output_path}")
-            else:
-                # Por defecto usar el formato que QGIS espera
-                driver_name = "GPKG"
-                if not output_path.lower().endswith('.gpkg'):
-                    output_path = output_path + '.gpkg'
-                feedback.pushInfo(f"📁 V2.0: Creando GeoPackage (por defecto) en: {output_path}")
+            feedback.pushInfo(f"📁 V2.0: Creando GeoPackage en: {output_path}")
         else:
             # Usar sink temporal que QGIS maneja automáticamente
             (sink, dest_id) = self.parameterAsSink(
@@ -425,68 +1078,28 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
                 
             feedback.pushInfo(f"📁 V2.0: Usando sink temporal de QGIS: {dest_id}")
             
-            # Crear diccionario para mapear áreas a features originales
-            area_to_feature = {}
-            for feature in input_layer.getFeatures():
-                area_val = feature[self._validar_campos_cuencas(input_layer)]
-                if area_val is not None and area_val > 0:
-                    area_to_feature[float(area_val)] = feature
-            
-            # Escribir features usando sink
-            features_escritas = 0
-            
-            for resultado in resultados:
-                try:
-                    area_cuenca = resultado['area']
-                    original_feature = area_to_feature.get(area_cuenca)
-                    
-                    if original_feature is None:
-                        continue
-                    
-                    # Crear nueva feature
-                    new_feature = QgsFeature(fields)
-                    
-                    # Copiar atributos originales
-                    for field in input_layer.fields():
-                        field_name = field.name()
-                        valor_original = original_feature[field_name]
-                        new_feature[field_name] = valor_original
-                    
-                    # Asignar valores calculados
-                    new_feature["MINPOINT_X"] = resultado['punto_min_x']
-                    new_feature["MINPOINT_Y"] = resultado['punto_min_y']
-                    new_feature["MINPOINT_Z"] = resultado['punto_min_z']
-                    new_feature["MAXPOINT_X"] = resultado['punto_max_x']
-                    new_feature["MAXPOINT_Y"] = resultado['punto_max_y']
-                    new_feature["MAXPOINT_Z"] = resultado['punto_max_z']
-                    new_feature["DIST_MAX"] = resultado['distancia_max']
-                    new_feature["DIAMETRO_EQ"] = resultado['diametro_equivalente']
-                    new_feature["VALOR_ELON"] = resultado['indice_elongacion']
-                    new_feature["CLASIF_ELON"] = resultado['clasificacion']
-                    new_feature["AREA_CUENCA"] = resultado['area']
-                    new_feature["NUM_PUNTOS"] = resultado['total_puntos']
-                    
-                    # Copiar geometría original
-                    new_feature.setGeometry(original_feature.geometry())
-                    
-                    if sink.addFeature(new_feature):
-                        features_escritas += 1
-                    
-                except Exception as e:
-                    feedback.pushWarning(f"Error escribiendo feature: {e}")
-                    continue
+            features_escritas = self._escribir_features_elongacion(
+                sink, fields, indices_calculados, originales, resultados, feedback
+            )
             
             feedback.pushInfo(f"✅ V2.0: Features escritas en sink: {features_escritas}/{len(resultados)}")
             return dest_id
         
-        # Crear writer con el driver correcto (solo para rutas específicas)
-        writer = QgsVectorFileWriter(
+        # Crear writer GeoPackage (solo para rutas específicas). El driver GPKG
+        # soporta transacciones, así que el writer agrupa todas las inserciones
+        # en una única transacción que se confirma al liberar el writer
+        opciones = QgsVectorFileWriter.SaveVectorOptions()
+        opciones.driverName = "GPKG"
+        opciones.fileEncoding = "UTF-8"
+        opciones.layerName = "elongacion"
+        
+        writer = QgsVectorFileWriter.create(
             output_path,
-            "UTF-8",
             fields,
             QgsWkbTypes.Polygon,
             input_layer.crs(),
-            driver_name
+            context.transformContext(),
+            opciones
         )
         
         if writer.hasError() != QgsVectorFileWriter.NoError:
@@ -494,739 +1107,321 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
             del writer
             return None
         
-        # Crear diccionario para mapear áreas a features originales
-        area_to_feature = {}
-        for feature in input_layer.getFeatures():
-            area_val = feature[self._validar_campos_cuencas(input_layer)]
-            if area_val is not None and area_val > 0:
-                area_to_feature[float(area_val)] = feature
+        features_escritas = self._escribir_features_elongacion(
+            writer, fields, indices_calculados, originales, resultados, feedback
+        )
         
-        # Escribir features
+        del writer
+        
+        feedback.pushInfo(f"✅ V2.0: Features escritas: {features_escritas}/{len(resultados)}")
+        
+        # Cargar al proyecto solo si es ruta específica
+        layer_name = f"Elongacion_Cuencas_{inicio.strftime(_FORMATO_MARCA_CAPA)}"
+        nueva_capa = QgsVectorLayer(f"{output_path}|layername={opciones.layerName}", layer_name, "ogr")
+        
+        if nueva_capa.isValid():
+            # Aplicar simbología con las clases ya calculadas (sin recorrer la capa)
+            clases_presentes = {r['clasificacion_id'] for r in resultados}
+            self._aplicar_simbologia_elongacion(nueva_capa, clases_presentes, feedback)
+            QgsProject.instance().addMapLayer(nueva_capa)
+            feedback.pushInfo(f"✅ V2.0: Capa '{layer_name}' agregada correctamente")
+        
+        return output_path
+    
+    def _escribir_features_elongacion(self, destino, fields, indices_calculados, originales, resultados, feedback):
+        """Escribe las cuencas con sus resultados en un sink o writer, por lotes con addFeatures"""
+        n_campos = fields.count()
         features_escritas = 0
+        pendientes = []
         
         for resultado in resultados:
             try:
-                area_cuenca = resultado['area']
-                original_feature = area_to_feature.get(area_cuenca)
+                original_feature = originales.get(resultado['fid'])
                 
                 if original_feature is None:
                     continue
                 
-                # Crear nueva feature
-                new_feature = QgsFeature(fields)
-                
-                # Copiar atributos originales
-                for field in input_layer.fields():
-                    field_name = field.name()
-                    valor_original = original_feature[field_name]
-                    new_feature[field_name] = valor_original
+                # Atributos originales seguidos de los calculados, asignados por posición
+                atributos = original_feature.attributes()
+                atributos.extend([None] * (n_campos - len(atributos)))
+                valores_calculados = (
+                    resultado['punto_min_x'],
+                    resultado['punto_min_y'],
+                    resultado['punto_min_z'],
+                    resultado['punto_max_x'],
+                    resultado['punto_max_y'],
+                    resultado['punto_max_z'],
+                    resultado['distancia_max'],
+                    resultado['diametro_equivalente'],
+                    resultado['indice_elongacion'],
+                    resultado['clasificacion'],
+                    resultado['clasificacion_id'],
+                    resultado['area'],
+                    resultado['total_puntos']
+                )
+                for indice, valor in zip(indices_calculados, valores_calculados):
+                    atributos[indice] = valor
                 
-                # Asignar valores calculados
-                new_feature["MINPOINT_X"] = resultado['punto_min_x']
-                new_feature["MINPOINT_Y"] = resultado['punto_min_y']
-                new_feature["MINPOINT_Z"] = resultado['punto_min_z']
-                new_feature["MAXPOINT_X"] = resultado['punto_max_x']
-                new_feature["MAXPOINT_Y"] = resultado['punto_max_y']
-                new_feature["MAXPOINT_Z"] = resultado['punto_max_z']
-                new_feature["DIST_MAX"] = resultado['distancia_max']
-                new_feature["DIAMETRO_EQ"] = resultado['diametro_equivalente']
-                new_feature["VALOR_ELON"] = resultado['indice_elongacion']
-                new_feature["CLASIF_ELON"] = resultado['clasificacion']
-                new_feature["AREA_CUENCA"] = resultado['area']
-                new_feature["NUM_PUNTOS"] = resultado['total_puntos']
+                new_feature = QgsFeature(fields)
+                new_feature.setAttributes(atributos)
                 
                 # Copiar geometría original
                 new_feature.setGeometry(original_feature.geometry())
                 
-                if writer.addFeature(new_feature):
-                    features_escritas += 1
+                pendientes.append(new_feature)
+                if len(pendientes) >= _TAMANO_LOTE_ESCRITURA:
+                    features_escritas += self._volcar_lote(destino, pendientes, feedback)
                 
             except Exception as e:
                 feedback.pushWarning(f"Error escribiendo feature: {e}")
                 continue
         
-        del writer
-        
-        feedback.pushInfo(f"✅ V2.0: Features escritas: {features_escritas}/{len(resultados)}")
-        
-        # Cargar al proyecto solo si es ruta específica
-        layer_name = f"Elongacion_Cuencas_{datetime.now().strftime('%H%M%S')}"
-        nueva_capa = QgsVectorLayer(output_path, layer_name, "ogr")
-        
-        if nueva_capa.isValid():
-            # Aplicar simbología
-            self._aplicar_simbologia_elongacion(nueva_capa, feedback)
-            QgsProject.instance().addMapLayer(nueva_capa)
-            feedback.pushInfo(f"✅ V2.0: Capa '{layer_name}' agregada correctamente")
-        
-        return output_path
+        features_escritas += self._volcar_lote(destino, pendientes, feedback)
+        return features_escritas
+    
+    def _volcar_lote(self, destino, pendientes, feedback):
+        """Envía el lote pendiente al destino y lo vacía; devuelve las features escritas"""
+        if not pendientes:
+            return 0
+        escritas = len(pendientes)
+        if not destino.addFeatures(pendientes):
+            feedback.pushWarning(f"No se pudo escribir un lote de {escritas} features")
+            escritas = 0
+        pendientes.clear()
+        return escritas
     
-    def _aplicar_simbologia_elongacion(self, capa, feedback):
-        """Aplica simbología categorizada por clasificación de elongación"""
+    def _obtener_features_originales(self, input_layer, resultados):
+        """Obtiene las features de cuencas con resultado en una sola petición por id"""
+        solicitud = QgsFeatureRequest().setFilterFids([r['fid'] for r in resultados])
+        return {feature.id(): feature for feature in input_layer.getFeatures(solicitud)}
+    
+    def _aplicar_simbologia_elongacion(self, capa, clases_presentes, feedback):
+        """Aplica simbología categorizada por clasificación de elongación (campo CLASIF_ID)"""
         try:
-            # Colores por clasificación
-            colores_clasificacion = {
-                "Muy alargada": QColor(139, 0, 0),
-                "Alargada": QColor(255, 69, 0),
-                "Ligeramente alargada": QColor(255, 140, 0),
-                "Ni alargada ni ensanchada": QColor(255, 215, 0),
-                "Ligeramente ensanchada": QColor(173, 255, 47),
-                "Ensanchada": QColor(0, 255, 127),
-                "Muy ensanchada": QColor(0, 191, 255),
-                "Rodeando el desagüe": QColor(30, 144, 255)
-            }
-            
-            # Obtener valores únicos
-            valores_unicos = set()
-            for feature in capa.getFeatures():
-                valor = feature['CLASIF_ELON']
-                if valor:
-                    valores_unicos.add(valor)
-            
-            # Crear categorías
-            categorias = []
-            for clasificacion in valores_unicos:
-                if clasificacion in colores_clasificacion:
-                    color = colores_clasificacion[clasificacion]
-                    simbolo = QgsSymbol.defaultSymbol(capa.geometryType())
-                    simbolo.setColor(color)
-                    simbolo.setOpacity(0.7)
-                    
-                    categoria = QgsRendererCategory(clasificacion, simbolo, clasificacion)
-                    categorias.append(categoria)
+            # Crear todas las categorías de una vez (solo clases presentes)
+            categorias = [
+                QgsRendererCategory(
+                    clasificacion_id,
+                    self._crear_simbolo_clase(capa, _COLORES_CLASIFICACION[clasificacion_id]),
+                    _CLASIFICACIONES_ELONGACION[clasificacion_id]
+                )
+                for clasificacion_id in sorted(clases_presentes)
+            ]
             
             if categorias:
-                renderer = QgsCategorizedSymbolRenderer('CLASIF_ELON', categorias)
-                capa.setRenderer(renderer)
+                capa.setRenderer(QgsCategorizedSymbolRenderer('CLASIF_ID', categorias))
+                capa.triggerRepaint()
                 feedback.pushInfo("🎨 V2.0: Simbología aplicada correctamente")
             
         except Exception as e:
             feedback.pushWarning(f"Error aplicando simbología: {e}")
     
-    def _calcular_estadisticas_elongacion(self, resultados, feedback):
+    def _crear_simbolo_clase(self, capa, color):
+        """Crea el símbolo de relleno semitransparente de una clase"""
+        simbolo = QgsSymbol.defaultSymbol(capa.geometryType())
+        simbolo.setColor(color)
+        simbolo.setOpacity(0.7)
+        return simbolo
+    
+    def _calcular_estadisticas_elongacion(self, resultados, feedback, inicio):
         """Calcula estadísticas completas de elongación"""
         if not resultados:
             return {"error": "No hay resultados"}
         
-        # Extraer valores
-        indices = [r['indice_elongacion'] for r in resultados]
-        areas = [r['area'] for r in resultados]
-        distancias = [r['distancia_max'] for r in resultados]
-        clasificaciones = [r['clasificacion'] for r in resultados]
-        
-        # Contar clasificaciones
-        conteo_clasificaciones = {}
-        for clasif in clasificaciones:
-            conteo_clasificaciones[clasif] = conteo_clasificaciones.get(clasif, 0) + 1
-        
-        # Calcular porcentajes
-        total_cuencas = len(resultados)
-        porcentajes_clasificaciones = {
-            clasif: (count / total_cuencas) * 100 
-            for clasif, count in conteo_clasificaciones.items()
-        }
+        # Extraer valores directamente a arreglos NumPy
+        n = len(resultados)
+        indices = np.fromiter((r['indice_elongacion'] for r in resultados), dtype=np.float64, count=n)
+        areas = np.fromiter((r['area'] for r in resultados), dtype=np.float64, count=n)
+        distancias = np.fromiter((r['distancia_max'] for r in resultados), dtype=np.float64, count=n)
+        clasificaciones_id = np.fromiter((r['clasificacion_id'] for r in resultados), dtype=np.intp, count=n)
+        
+        # Índices: suma y suma de cuadrados en una sola lectura del arreglo;
+        # la mediana por selección parcial (O(n)) en lugar de ordenar todo
+        indice_promedio = indices.sum() / n
+        indice_desviacion = math.sqrt(max(np.dot(indices, indices) / n - indice_promedio ** 2, 0.0))
+        mitad = n // 2
+        if n % 2:
+            indice_mediana = np.partition(indices, mitad)[mitad]
+        else:
+            parcial = np.partition(indices, (mitad - 1, mitad))
+            indice_mediana = (parcial[mitad - 1] + parcial[mitad]) / 2
+        
+        # Contar clasificaciones presentes por CLASIF_ID y sus porcentajes en NumPy
+        total_cuencas = n
+        ids_presentes, primeras, conteos = np.unique(
+            clasificaciones_id, return_index=True, return_counts=True
+        )
+        porcentajes = conteos * (100 / total_cuencas)
+        nombres = [_CLASIFICACIONES_ELONGACION[i] for i in ids_presentes.tolist()]
+        filas_clasificaciones = list(zip(nombres, conteos.tolist(), porcentajes.tolist()))
+        conteo_clasificaciones = {nombre: conteo for nombre, conteo, _ in filas_clasificaciones}
+        porcentajes_clasificaciones = {nombre: pct for nombre, _, pct in filas_clasificaciones}
+        
+        # Clase predominante; en caso de empate, la que aparece primero en los resultados
+        empatadas = np.flatnonzero(conteos == conteos.max())
+        mayor = int(empatadas[primeras[empatadas].argmin()])
+        clasificacion_predominante = nombres[mayor]
         
         estadisticas = {
             "total_cuencas": total_cuencas,
-            "fecha_analisis": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "fecha_analisis": inicio.strftime(_FORMATO_FECHA_ANALISIS),
             
             # Estadísticas de índices
-            "indice_promedio": np.mean(indices),
-            "indice_maximo": np.max(indices),
-            "indice_minimo": np.min(indices),
-            "indice_mediana": np.median(indices),
-            "indice_desviacion": np.std(indices),
+            "indice_promedio": indice_promedio,
+            "indice_maximo": indices.max(),
+            "indice_minimo": indices.min(),
+            "indice_mediana": indice_mediana,
+            "indice_desviacion": indice_desviacion,
             
             # Estadísticas de áreas
-            "area_promedio": np.mean(areas),
-            "area_maxima": np.max(areas),
-            "area_minima": np.min(areas),
-            "area_total": np.sum(areas),
+            "area_promedio": areas.mean(),
+            "area_maxima": areas.max(),
+            "area_minima": areas.min(),
+            "area_total": areas.sum(),
             
             # Estadísticas de distancias
-            "distancia_promedio": np.mean(distancias),
-            "distancia_maxima": np.max(distancias),
-            "distancia_minima": np.min(distancias),
+            "distancia_promedio": distancias.mean(),
+            "distancia_maxima": distancias.max(),
+            "distancia_minima": distancias.min(),
             
             # Clasificaciones
             "conteo_clasificaciones": conteo_clasificaciones,
             "porcentajes_clasificaciones": porcentajes_clasificaciones,
-            "clasificacion_predominante": max(conteo_clasificaciones.items(), key=lambda x: x[1])[0]
+            "filas_clasificaciones": filas_clasificaciones,
+            "clasificacion_predominante": clasificacion_predominante,
+            "porcentaje_predominante": porcentajes_clasificaciones[clasificacion_predominante]
         }
         
         return estadisticas
     
-    def _generar_reporte_html_elongacion(self, resultados, estadisticas, feedback):
+    def _generar_reporte_html_elongacion(self, resultados, estadisticas, feedback, inicio):
         """Genera reporte HTML completo en directorio temporal"""
+        # No generar el reporte si el usuario canceló el proceso
+        if feedback.isCanceled():
+            return
+        
+        # Sin estadísticas válidas no hay nada que reportar
+        if "error" in estadisticas or not estadisticas.get('total_cuencas'):
+            feedback.pushWarning("V2.0: Sin estadísticas válidas, no se genera el reporte HTML")
+            return
+        
         try:
-            # Preparar datos
-            tabla_cuencas = self._crear_tabla_html_cuencas(resultados)
-            grafico_datos = self._preparar_datos_grafico_html(estadisticas)
+            # Importaciones diferidas: solo se usan al generar el reporte
+            import tempfile
+            import webbrowser
             
-            # Crear contenido HTML
-            html_content = f"""
-            <!DOCTYPE html>
-            <html lang="es">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Reporte Elongación V2.0 - UTPL</title>
-                <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-                <style>
-                    * {{ box-sizing: border-box; }}
-                    body {{
-                        font-family: 'Segoe UI', 'Helvetica Neue', Arial, sans-serif;
-                        line-height: 1.6;
-                        margin: 0;
-                        padding: 20px;
-                        background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-                        color: #1a202c;
-                    }}
-                    .container {{
-                        max-width: 1200px;
-                        margin: 0 auto;
-                        background: white;
-                        padding: 40px;
-                        border-radius: 12px;
-                        box-shadow: 0 10px 25px rgba(0,0,0,0.08);
-                        border: 1px solid #e2e8f0;
-                    }}
-                    .header {{
-                        text-align: center;
-                        border-bottom: 3px solid #2d3748;
-                        padding-bottom: 25px;
-                        margin-bottom: 35px;
-                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                        margin: -40px -40px 35px -40px;
-                        padding: 40px 40px 25px 40px;
-                        border-radius: 12px 12px 0 0;
-                        color: white;
-                    }}
-                    .header h1 {{
-                        margin: 0;
-                        font-size: 2.8em;
-                        font-weight: 700;
-                        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-                        font-family: 'Times New Roman', serif;
-                    }}
-                    .header p {{
-                        margin: 10px 0 5px 0;
-                        font-size: 1.1em;
-                        opacity: 0.95;
-                    }}
-                    .version-badge {{
-                        background: linear-gradient(135deg, #48bb78 0%, #38a169 100%);
-                        color: white;
-                        padding: 8px 20px;
-                        border-radius: 25px;
-                        font-size: 0.9em;
-                        font-weight: 600;
-                        display: inline-block;
-                        margin-top: 15px;
-                        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-                    }}
-                    .section {{
-                        margin: 35px 0;
-                        padding: 25px;
-                        background: #f8fafc;
-                        border-radius: 10px;
-                        border-left: 5px solid #4299e1;
-                        box-shadow: 0 2px 4px rgba(0,0,0,0.04);
-                    }}
-                    .section h2 {{
-                        color: #2d3748;
-                        margin-top: 0;
-                        font-size: 1.6em;
-                        font-weight: 600;
-                        display: flex;
-                        align-items: center;
-                        gap: 10px;
-                    }}
-                    .stats-grid {{
-                        display: grid;
-                        grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
-                        gap: 20px;
-                        margin: 25px 0;
-                    }}
-                    .stat-card {{
-                        background: white;
-                        padding: 25px;
-                        border-radius: 10px;
-                        border-left: 5px solid #48bb78;
-                        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-                        transition: transform 0.2s ease, box-shadow 0.2s ease;
-                    }}
-                    .stat-card:hover {{
-                        transform: translateY(-2px);
-                        box-shadow: 0 8px 15px rgba(0,0,0,0.1);
-                    }}
-                    .stat-value {{
-                        font-size: 2.2em;
-                        font-weight: 700;
-                        color: #2d3748;
-                        margin: 0;
-                        font-family: 'Arial', sans-serif;
-                    }}
-                    .stat-label {{
-                        color: #718096;
-                        margin: 8px 0 0 0;
-                        font-size: 0.95em;
-                        font-weight: 500;
-                        text-transform: uppercase;
-                        letter-spacing: 0.5px;
-                    }}
-                    .tabla-cuencas {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin: 25px 0;
-                        font-size: 0.9em;
-                        background: white;
-                        border-radius: 8px;
-                        overflow: hidden;
-                        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-                    }}
-                    .tabla-cuencas th {{
-                        background: linear-gradient(135deg, #4a5568 0%, #2d3748 100%);
-                        color: white;
-                        font-weight: 600;
-                        padding: 15px 12px;
-                        text-align: left;
-                        font-size: 0.85em;
-                        text-transform: uppercase;
-                        letter-spacing: 0.5px;
-                    }}
-                    .tabla-cuencas td {{
-                        padding: 12px;
-                        border-bottom: 1px solid #e2e8f0;
-                    }}
-                    .tabla-cuencas tr:nth-child(even) {{
-                        background-color: #f7fafc;
-                    }}
-                    .tabla-cuencas tr:hover {{
-                        background-color: #edf2f7;
-                    }}
-                    .grafico-container {{
-                        margin: 30px 0;
-                        padding: 25px;
-                        background: white;
-                        border-radius: 10px;
-                        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-                        border: 1px solid #e2e8f0;
-                    }}
-                    .footer {{
-                        text-align: center;
-                        margin-top: 50px;
-                        padding-top: 30px;
-                        border-top: 2px solid #e2e8f0;
-                        color: #718096;
-                        background: #f8fafc;
-                        margin-left: -40px;
-                        margin-right: -40px;
-                        margin-bottom: -40px;
-                        padding-left: 40px;
-                        padding-right: 40px;
-                        padding-bottom: 30px;
-                        border-radius: 0 0 12px 12px;
-                    }}
-                    .footer p {{
-                        margin: 8px 0;
-                    }}
-                    .interpretacion {{
-                        background: linear-gradient(135deg, #e6fffa 0%, #b2f5ea 100%);
-                        padding: 25px;
-                        border-radius: 10px;
-                        border-left: 5px solid #38b2ac;
-                        margin: 25px 0;
-                        box-shadow: 0 2px 4px rgba(0,0,0,0.04);
-                    }}
-                    .interpretacion h3 {{
-                        color: #234e52;
-                        margin-top: 0;
-                        font-size: 1.3em;
-                    }}
-                    .interpretacion ul {{
-                        color: #2c7a7b;
-                        line-height: 1.8;
-                    }}
-                    .interpretacion li {{
-                        margin-bottom: 8px;
-                    }}
-                    @media print {{
-                        body {{ background: white; }}
-                        .container {{ box-shadow: none; }}
-                        .header {{ background: #2d3748 !important; }}
-                    }}
-                    @media (max-width: 768px) {{
-                        .container {{ padding: 20px; margin: 10px; }}
-                        .header {{ margin: -20px -20px 25px -20px; padding: 30px 20px 20px 20px; }}
-                        .header h1 {{ font-size: 2.2em; }}
-                        .stats-grid {{ grid-template-columns: 1fr; }}
-                        .tabla-cuencas {{ font-size: 0.8em; }}
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>Análisis de Elongación de Cuencas</h1>
-                        <div class="version-badge">Versión 2.0 Interactiva</div>
-                        <p>Universidad Técnica Particular de Loja - UTPL</p>
-                        <p>Fecha de análisis: {estadisticas.get('fecha_analisis', 'N/A')}</p>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>📊 Resumen Ejecutivo</h2>
-                        <div class="stats-grid">
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('total_cuencas', 0)}</p>
-                                <p class="stat-label">Total de Cuencas Analizadas</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('area_total', 0):.2f}</p>
-                                <p class="stat-label">Área Total Analizada</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('indice_promedio', 0):.3f}</p>
-                                <p class="stat-label">Índice de Elongación Promedio</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('clasificacion_predominante', 'N/A')}</p>
-                                <p class="stat-label">Clasificación Predominante</p>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>📈 Análisis Morfométrico de Cuencas</h2>
-                        <div class="grafico-container">
-                            <div id="grafico-barras" style="width:100%;height:600px;margin-bottom:40px;"></div>
-                        </div>
-                        <div class="grafico-container">
-                            <div id="grafico-circular" style="width:100%;height:500px;"></div>
-                        </div>
-                        <p style="text-align: center; margin-top: 20px; color: #666; font-style: italic;">
-                            <strong>Nota metodológica:</strong> Clasificación basada en Schumm (1956) mediante el índice Re = Diámetro equivalente / Distancia máxima.<br>
-                            El análisis considera la relación área-forma para caracterización geomorfológica de cuencas hidrográficas.
-                        </p>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>📋 Estadísticas Detalladas</h2>
-                        <div class="stats-grid">
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('indice_maximo', 0):.4f}</p>
-                                <p class="stat-label">Índice Máximo</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('indice_minimo', 0):.4f}</p>
-                                <p class="stat-label">Índice Mínimo</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('indice_mediana', 0):.4f}</p>
-                                <p class="stat-label">Mediana</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('indice_desviacion', 0):.4f}</p>
-                                <p class="stat-label">Desviación Estándar</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('area_maxima', 0):.2f}</p>
-                                <p class="stat-label">Área Máxima de Cuenca</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('distancia_maxima', 0):.2f} m</p>
-                                <p class="stat-label">Distancia Máxima</p>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>📊 Detalle por Cuencas</h2>
-                        {tabla_cuencas}
-                    </div>
-                    
-                    <div class="section">
-                        <h2>📏 Tabla de Clasificación de Elongación</h2>
-                        <p><strong>Clasificación según Schumm (1956):</strong></p>
-                        <table class="tabla-cuencas" style="margin-top: 15px;">
-                            <thead>
-                                <tr>
-                                    <th>Clasificación</th>
-                                    <th>Rango del Índice (Re)</th>
-                                    <th>Descripción Morfológica</th>
-                                    <th>Características</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                                <tr>
-                                    <td><strong>Muy alargada</strong></td>
-                                    <td>Re &lt; 0.22</td>
-                                    <td>Forma muy estrecha y alargada</td>
-                                    <td>Cuencas con control estructural fuerte</td>
-                                </tr>
-                                <tr>
-                                    <td><strong>Alargada</strong></td>
-                                    <td>0.22 ≤ Re &lt; 0.30</td>
-                                    <td>Forma alargada</td>
-                                    <td>Topografía montañosa pronunciada</td>
-                                </tr>
-                                <tr>
-                                    <td><strong>Ligeramente alargada</strong></td>
-                                    <td>0.30 ≤ Re &lt; 0.37</td>
-                                    <td>Tendencia alargada</td>
-                                    <td>Desarrollo fluvial en terrenos inclinados</td>
-                                </tr>
-                                <tr>
-                                    <td><strong>Intermedia</strong></td>
-                                    <td>0.37 ≤ Re &lt; 0.45</td>
-                                    <td>Forma equilibrada</td>
-                                    <td>Topografía moderada, desarrollo maduro</td>
-                                </tr>
-                                <tr>
-                                    <td><strong>Ligeramente ensanchada</strong></td>
-                                    <td>0.45 ≤ Re ≤ 0.60</td>
-                                    <td>Tendencia ensanchada</td>
-                                    <td>Pendientes suaves, erosión moderada</td>
-                                </tr>
-                                <tr>
-                                    <td><strong>Ensanchada</strong></td>
-                                    <td>0.60 &lt; Re ≤ 0.80</td>
-                                    <td>Forma ensanchada</td>
-                                    <td>Control litológico horizontal</td>
-                                </tr>
-                                <tr>
-                                    <td><strong>Muy ensanchada</strong></td>
-                                    <td>0.80 &lt; Re ≤ 1.20</td>
-                                    <td>Forma muy ancha</td>
-                                    <td>Topografía muy suave</td>
-                                </tr>
-                                <tr>
-                                    <td><strong>Circular</strong></td>
-                                    <td>Re &gt; 1.20</td>
-                                    <td>Forma tendiendo a circular</td>
-                                    <td>Cuencas rodeando el punto de desagüe</td>
-                                </tr>
-                            </tbody>
-                        </table>
-                        <p style="margin-top: 15px; font-style: italic; color: #666;">
-                            <strong>Nota:</strong> Re = Índice de elongación = Diámetro equivalente / Distancia máxima<br>
-                            Donde: Diámetro equivalente = 2√(Área/π)
-                        </p>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>💡 Interpretación Geomorfológica</h2>
-                        <div class="interpretacion">
-                            {self._generar_interpretacion_elongacion_html(estadisticas)}
-                        </div>
-                    </div>
-                    
-                    <div class="footer">
-                        <p><strong>Reporte generado automáticamente por el Plugin de Índices Morfológicos V2.0</strong></p>
-                        <p>Universidad Técnica Particular de Loja - Departamento de Ingeniería Civil</p>
-                        <p>Desarrollado por: Santiago Quiñones - Docente Investigador</p>
-                    </div>
-                </div>
-                
-                <script>
-                    {grafico_datos}
-                </script>
-            </body>
-            </html>
-            """
+            # Nombre único por ejecución con la marca de tiempo del análisis
+            timestamp = inicio.strftime(_FORMATO_MARCA_ARCHIVO)
+            ruta_html = os.path.join(tempfile.gettempdir(), f"reporte_elongacion_v2_interactivo_{timestamp}.html")
+            
+            # Valores dinámicos de la plantilla
+            valores = dict(
+                plotly_src=_fuente_plotly(),
+                fecha_analisis=estadisticas.get('fecha_analisis', 'N/A'),
+                total_cuencas=estadisticas.get('total_cuencas', 0),
+                area_total=f"{estadisticas.get('area_total', 0):.2f}",
+                indice_promedio=f"{estadisticas.get('indice_promedio', 0):.3f}",
+                clasificacion_predominante=escape(str(estadisticas.get('clasificacion_predominante', 'N/A'))),
+                indice_maximo=f"{estadisticas.get('indice_maximo', 0):.4f}",
+                indice_minimo=f"{estadisticas.get('indice_minimo', 0):.4f}",
+                indice_mediana=f"{estadisticas.get('indice_mediana', 0):.4f}",
+                indice_desviacion=f"{estadisticas.get('indice_desviacion', 0):.4f}",
+                area_maxima=f"{estadisticas.get('area_maxima', 0):.2f}",
+                distancia_maxima=f"{estadisticas.get('distancia_maxima', 0):.2f}",
+                interpretacion=self._generar_interpretacion_elongacion_html(estadisticas),
+                grafico_datos=self._preparar_datos_grafico_html(estadisticas)
+            )
             
-            # Guardar en directorio temporal
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            temp_dir = tempfile.gettempdir()
-            ruta_html = os.path.join(temp_dir, f"reporte_elongacion_v2_interactivo_{timestamp}.html")
+            if feedback.isCanceled():
+                return
             
-            with open(ruta_html, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # Escribir por partes, sin armar el documento completo en memoria; se
+            # escribe a un temporal y se renombra para no dejar reportes a medias
+            ruta_parcial = ruta_html + '.part'
+            try:
+                with open(ruta_parcial, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+                    f.writelines(self._iter_secciones_html(resultados, valores))
+                os.replace(ruta_parcial, ruta_html)
+            finally:
+                # Si la escritura falló, no dejar el temporal en el directorio
+                if os.path.exists(ruta_parcial):
+                    os.remove(ruta_parcial)
+            feedback.pushInfo(f"📄 V2.0: Reporte HTML generado: {ruta_html}")
             
             # Abrir en navegador
             webbrowser.open(f"file://{ruta_html}")
-            feedback.pushInfo(f"📄 V2.0: Reporte HTML generado: {ruta_html}")
                 
         except Exception as e:
             feedback.reportError(f"Error generando reporte HTML: {e}")
     
-    def _crear_tabla_html_cuencas(self, resultados):
-        """Crea tabla HTML con detalles de cada cuenca"""
-        tabla_html = '<table class="tabla-cuencas">\n'
-        tabla_html += '<thead>\n<tr>\n'
-        tabla_html += '<th>Cuenca ID</th><th>Área</th><th>Distancia Máx</th><th>Índice Elongación</th>'
-        tabla_html += '<th>Clasificación</th><th>Puntos Analizados</th>\n'
-        tabla_html += '</tr>\n</thead>\n<tbody>\n'
+    def _iter_secciones_html(self, resultados, valores):
+        """Genera las secciones del reporte HTML en orden de escritura"""
+        yield _PLANTILLA_REPORTE_HTML_INICIO.substitute(valores)
+        yield from self._iter_tabla_html_cuencas(resultados)
+        yield _PLANTILLA_REPORTE_HTML_FIN.substitute(valores)
+    
+    def _iter_tabla_html_cuencas(self, resultados):
+        """Genera la tabla HTML con detalles de cada cuenca, fila a fila"""
+        yield _ENCABEZADO_TABLA_CUENCAS
         
+        fila = _FILA_TABLA_CUENCAS.format
         for i, resultado in enumerate(resultados, 1):
-            tabla_html += f'<tr>\n'
-            tabla_html += f'<td>Cuenca {i}</td>'
-            tabla_html += f'<td>{resultado["area"]:.2f}</td>'
-            tabla_html += f'<td>{resultado["distancia_max"]:.2f} m</td>'
-            tabla_html += f'<td>{resultado["indice_elongacion"]:.4f}</td>'
-            tabla_html += f'<td>{resultado["clasificacion"]}</td>'
-            tabla_html += f'<td>{resultado["total_puntos"]}</td>'
-            tabla_html += f'</tr>\n'
-        
-        tabla_html += '</tbody>\n</table>'
-        return tabla_html
+            yield fila(
+                i,
+                resultado["area"],
+                resultado["distancia_max"],
+                resultado["indice_elongacion"],
+                _CLASIFICACIONES_ELONGACION_HTML[resultado["clasificacion_id"]],
+                resultado["total_puntos"]
+            )
+        
+        yield _PIE_TABLA_CUENCAS
     
     def _preparar_datos_grafico_html(self, estadisticas):
         """Prepara datos JavaScript para gráfico Plotly"""
         conteo = estadisticas['conteo_clasificaciones']
         porcentajes = estadisticas['porcentajes_clasificaciones']
         
-        # Ordenar clasificaciones
-        orden_clasificaciones = [
-            "Rodeando el desagüe",
-            "Muy ensanchada", 
-            "Ensanchada",
-            "Ligeramente ensanchada",
-            "Ni alargada ni ensanchada",
-            "Ligeramente alargada",
-            "Alargada",
-            "Muy alargada"
-        ]
-        
-        clasificaciones_existentes = [c for c in orden_clasificaciones if c in conteo]
-        valores = [conteo[c] for c in clasificaciones_existentes]
-        porcentajes_vals = [porcentajes[c] for c in clasificaciones_existentes]
-        
-        # Colores
-        colores_profesionales = {
-            "Muy alargada": "#8B0000",
-            "Alargada": "#DC143C",
-            "Ligeramente alargada": "#FF6347",
-            "Ni alargada ni ensanchada": "#FFD700",
-            "Ligeramente ensanchada": "#9ACD32",
-            "Ensanchada": "#32CD32",
-            "Muy ensanchada": "#1E90FF",
-            "Rodeando el desagüe": "#4169E1"
+        # Clasificaciones presentes (abreviadas) con su conteo, porcentaje y
+        # color en una sola pasada
+        clasificaciones_abrev, valores, porcentajes_vals, colores = [], [], [], []
+        for c, abreviatura, color in _SERIES_GRAFICO:
+            valor = conteo.get(c)
+            if valor is None:
+                continue
+            clasificaciones_abrev.append(abreviatura)
+            valores.append(valor)
+            porcentajes_vals.append(porcentajes[c])
+            colores.append(color)
+        
+        datos = {
+            "clasificaciones": clasificaciones_abrev,
+            "valores": valores,
+            "porcentajes": porcentajes_vals,
+            "colores": colores
         }
-        
-        colores = [colores_profesionales.get(c, "#808080") for c in clasificaciones_existentes]
-        
-        # Abreviaciones
-        clasificaciones_abrev = []
-        for c in clasificaciones_existentes:
-            if c == "Ni alargada ni ensanchada":
-                clasificaciones_abrev.append("Intermedia")
-            elif c == "Ligeramente alargada":
-                clasificaciones_abrev.append("Lig. alargada")
-            elif c == "Ligeramente ensanchada":
-                clasificaciones_abrev.append("Lig. ensanchada")
-            elif c == "Rodeando el desagüe":
-                clasificaciones_abrev.append("Circular")
-            else:
-                clasificaciones_abrev.append(c)
-        
-        script_js = f"""
-        var clasificaciones_display = {clasificaciones_abrev};
-        var valores = {valores};
-        var porcentajes = {porcentajes_vals};
-        var colores = {colores};
-        
-        // Gráfico de barras horizontales
-        var trace_barras = {{
-            x: valores,
-            y: clasificaciones_display,
-            type: 'bar',
-            orientation: 'h',
-            marker: {{
-                color: colores,
-                opacity: 0.85,
-                line: {{ color: '#2F2F2F', width: 1.2 }}
-            }},
-            text: valores.map((v, i) => `${{v}} cuencas (${{porcentajes[i].toFixed(1)}}%)`),
-            textposition: 'outside',
-            textfont: {{ family: 'Arial, sans-serif', size: 11, color: '#2F2F2F' }},
-            name: 'Distribución Morfométrica'
-        }};
-        
-        var layout_principal = {{
-            title: {{
-                text: 'Distribución Morfométrica de Cuencas Hidrográficas<br><sub>Índice de Elongación según Schumm (1956)</sub>',
-                font: {{ family: 'Times New Roman, serif', size: 16, color: '#1f2937', weight: 'bold' }},
-                x: 0.5, y: 0.95
-            }},
-            xaxis: {{
-                title: {{ text: 'Número de Cuencas', font: {{ family: 'Arial, sans-serif', size: 13 }} }},
-                showgrid: true, 
-                gridcolor: '#F3F4F6',
-                showline: true, 
-                linecolor: '#D1D5DB'
-            }},
-            yaxis: {{
-                title: {{ text: 'Clasificación Morfométrica', font: {{ family: 'Arial, sans-serif', size: 13 }} }},
-                showgrid: false, 
-                showline: true, 
-                linecolor: '#D1D5DB',
-                automargin: true
-            }},
-            plot_bgcolor: 'white',
-            paper_bgcolor: 'white',
-            showlegend: false,
-            margin: {{ l: 150, r: 80, t: 100, b: 80 }}
-        }};
-        
-        Plotly.newPlot('grafico-barras', [trace_barras], layout_principal);
-        
-        // Gráfico circular
-        var trace_circular = {{
-            labels: clasificaciones_display,
-            values: porcentajes,
-            type: 'pie',
-            marker: {{ colors: colores, line: {{ color: '#FFFFFF', width: 2 }} }},
-            textinfo: 'label+percent',
-            textposition: 'outside',
-            hole: 0.3
-        }};
-        
-        var layout_circular = {{
-            title: {{ text: 'Distribución Porcentual<br><sub>Análisis Morfométrico Regional</sub>' }},
-            showlegend: true,
-            legend: {{ orientation: 'v', x: 1.02, y: 0.5 }},
-            annotations: [{{
-                text: 'Total:<br>{estadisticas.get("total_cuencas", 0)}<br>cuencas',
-                showarrow: false, x: 0.5, y: 0.5
-            }}]
-        }};
-        
-        Plotly.newPlot('grafico-circular', [trace_circular], layout_circular);
-        """
-        
-        return script_js
+        return _PLANTILLA_GRAFICOS_JS.substitute(
+            datos=json.dumps(datos, ensure_ascii=False, separators=(',', ':')),
+            total_cuencas=estadisticas.get("total_cuencas", 0)
+        )
     
     def _generar_interpretacion_elongacion_html(self, estadisticas):
         """Genera interpretación geomorfológica automática"""
         try:
             indice_promedio = estadisticas.get('indice_promedio', 0)
             clasificacion_pred = estadisticas.get('clasificacion_predominante', '')
-            porcentajes = estadisticas.get('porcentajes_clasificaciones', {})
-            
-            interpretacion = "<h3>Análisis Geomorfológico Automático:</h3><ul>"
-            
-            if indice_promedio < 0.30:
-                interpretacion += "<li><strong>Cuencas Predominantemente Alargadas:</strong> El índice promedio indica que las cuencas tienden a ser alargadas, característica de sistemas fluviales con control estructural fuerte o topografía montañosa pronunciada.</li>"
-            elif indice_promedio < 0.45:
-                interpretacion += "<li><strong>Cuencas de Forma Intermedia:</strong> El índice promedio sugiere cuencas con formas equilibradas, típicas de terrenos con topografía moderada y desarrollo fluvial maduro.</li>"
-            elif indice_promedio < 0.80:
-                interpretacion += "<li><strong>Cuencas Tendiendo a Ensanchadas:</strong> El índice promedio indica cuencas con tendencia al ensanchamiento, características de terrenos con pendientes suaves y control litológico horizontal.</li>"
-            else:
-                interpretacion += "<li><strong>Cuencas Muy Ensanchadas:</strong> El índice promedio sugiere cuencas muy ensanchadas, típicas de zonas con topografía muy suave o control estructural particular.</li>"
-            
-            porcentaje_pred = porcentajes.get(clasificacion_pred, 0)
-            interpretacion += f"<li><strong>Clasificación Predominante:</strong> {clasificacion_pred} ({porcentaje_pred:.1f}% de las cuencas), lo que sugiere un patrón geomorfológico dominante en la región de estudio.</li>"
+            porcentaje_pred = estadisticas.get('porcentaje_predominante', 0)
             
-            interpretacion += "</ul>"
+            texto_indice = _TEXTOS_INTERPRETACION[bisect.bisect_right(_LIMITES_INTERPRETACION, indice_promedio)]
             
-            interpretacion += "<h3>Recomendaciones:</h3><ul>"
-            interpretacion += "<li>Correlacionar los patrones de elongación con mapas geológicos para identificar controles litológicos.</li>"
-            interpretacion += "<li>Analizar la relación entre elongación y características hidrográficas (orden de corrientes, densidad de drenaje).</li>"
-            interpretacion += "<li>Considerar análisis complementarios de otros índices morfométricos para validación.</li>"
-            interpretacion += "</ul>"
+            partes = [
+                _INTERPRETACION_ENCABEZADO,
+                texto_indice,
+                _INTERPRETACION_PREDOMINANTE.format(clasificacion=escape(clasificacion_pred), porcentaje=porcentaje_pred),
+                _RECOMENDACIONES_HTML
+            ]
             
-            return interpretacion
+            return "".join(partes)
         except Exception:
             return "<p>No se pudo generar interpretación automática.</p>"
     
@@ -1236,26 +1431,30 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
             feedback.reportError("V2.0: No se pudieron calcular estadísticas válidas")
             return
         
-        feedback.pushInfo("=" * 60)
-        feedback.pushInfo("📊 ESTADÍSTICAS ELONGACIÓN V2.0")
-        feedback.pushInfo("=" * 60)
-        feedback.pushInfo(f"Total de cuencas: {estadisticas['total_cuencas']}")
-        feedback.pushInfo(f"Área total analizada: {estadisticas['area_total']:.2f}")
-        feedback.pushInfo(f"Clasificación predominante: {estadisticas['clasificacion_predominante']}")
-        feedback.pushInfo("")
-        feedback.pushInfo("ÍNDICES DE ELONGACIÓN:")
-        feedback.pushInfo(f"  Promedio: {estadisticas['indice_promedio']:.4f}")
-        feedback.pushInfo(f"  Máximo: {estadisticas['indice_maximo']:.4f}")
-        feedback.pushInfo(f"  Mínimo: {estadisticas['indice_minimo']:.4f}")
-        feedback.pushInfo(f"  Mediana: {estadisticas['indice_mediana']:.4f}")
-        feedback.pushInfo("")
-        feedback.pushInfo("DISTRIBUCIÓN POR CLASIFICACIONES:")
-        conteo = estadisticas['conteo_clasificaciones']
-        porcentajes = estadisticas['porcentajes_clasificaciones']
-        for clasif, count in conteo.items():
-            porcentaje = porcentajes[clasif]
-            feedback.pushInfo(f"  {clasif}: {count} ({porcentaje:.1f}%)")
-        feedback.pushInfo("=" * 60)
+        # Un solo mensaje multilínea en lugar de una llamada a pushInfo por línea
+        lineas = [
+            _SEPARADOR_ESTADISTICAS,
+            "📊 ESTADÍSTICAS ELONGACIÓN V2.0",
+            _SEPARADOR_ESTADISTICAS,
+            f"Total de cuencas: {estadisticas['total_cuencas']}",
+            f"Área total analizada: {estadisticas['area_total']:.2f}",
+            f"Clasificación predominante: {estadisticas['clasificacion_predominante']}",
+            "",
+            "ÍNDICES DE ELONGACIÓN:",
+            f"  Promedio: {estadisticas['indice_promedio']:.4f}",
+            f"  Máximo: {estadisticas['indice_maximo']:.4f}",
+            f"  Mínimo: {estadisticas['indice_minimo']:.4f}",
+            f"  Mediana: {estadisticas['indice_mediana']:.4f}",
+            "",
+            "DISTRIBUCIÓN POR CLASIFICACIONES:"
+        ]
+        lineas.extend(
+            f"  {clasif}: {count} ({porcentaje:.1f}%)"
+            for clasif, count, porcentaje in estadisticas['filas_clasificaciones']
+        )
+        lineas.append(_SEPARADOR_ESTADISTICAS)
+        
+        feedback.pushInfo("\n".join(lineas))
     
     def name(self):
         return 'elongacion_v2'
@@ -1298,6 +1497,7 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
         <ul>
         <li><strong>VALOR_ELON:</strong> Índice de elongación calculado (valor Re)</li>
         <li><strong>CLASIF_ELON:</strong> Clasificación morfológica textual de la cuenca</li>
+        <li><strong>CLASIF_ID:</strong> Código numérico de la clasificación (0 = Muy alargada ... 7 = Rodeando el desagüe)</li>
         <li><strong>DIST_MAX:</strong> Distancia máxima 3D entre puntos extremos de elevación</li>
         <li><strong>MINPOINT_X/Y/Z:</strong> Coordenadas del punto de menor elevación</li>
         <li><strong>MAXPOINT_X/Y/Z:</strong> Coordenadas del punto de mayor elevación</li>
@@ -1319,7 +1519,7 @@ class ElongacionAlgorithm(QgsProcessingAlgorithm):
         </ul>
         
         <h4>Archivos de salida:</h4>
-        <p>El shapefile se guarda en la ubicación especificada por el usuario, o en directorio temporal si no se especifica ruta. El reporte HTML siempre se genera en directorio temporal y se abre automáticamente en el navegador web predeterminado.</p>
+        <p>La capa de resultados se guarda como GeoPackage (.gpkg) en la ubicación especificada por el usuario, o en directorio temporal si no se especifica ruta. El reporte HTML siempre se genera en directorio temporal y se abre automáticamente en el navegador web predeterminado.</p>
         
         <h4>Proceso automatizado:</h4>
         <p>El algoritmo identifica automáticamente los campos de coordenadas en las capas de entrada, localiza los puntos de elevación máxima y mínima dentro de cada cuenca, y calcula la distancia 3D entre estos puntos extremos para determinar el índice de elongación.</p>
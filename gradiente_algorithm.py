@@ -31,16 +31,346 @@ from qgis.PyQt.QtCore import QVariant
 from qgis.PyQt.QtGui import QColor
 import processing
 import os
+import re
 import math
+import traceback
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Qt5Agg')
-import tempfile
+import json
+import string
 from datetime import datetime
-import webbrowser
 from collections import defaultdict
 
+# Formatos de fecha de la marca de tiempo de cada ejecución
+_FORMATO_FECHA_ANALISIS = "%Y-%m-%d %H:%M:%S"
+_FORMATO_MARCA_ARCHIVO = '%Y%m%d_%H%M%S'
+
+# Líneas separadoras del log (encabezado de ejecución y resumen de estadísticas)
+_SEPARADOR_ENCABEZADO = "=" * 80
+_SEPARADOR_ESTADISTICAS = "=" * 60
+
+# Número de features que se envían juntas al sink con addFeatures
+_TAMANO_LOTE_ESCRITURA = 1000
+
+# CSS del reporte compactado al importar: sin comentarios ni espacios sobrantes
+_RE_COMENTARIOS_CSS = re.compile(r'/\*.*?\*/', re.S)
+_RE_ESPACIOS_CSS = re.compile(r'\s+')
+_RE_SEPARADORES_CSS = re.compile(r'\s*([{};:,])\s*')
+_RE_BLOQUE_ESTILOS = re.compile(r'(<style>)(.*?)(</style>)', re.S)
+
+
+def _minificar_estilos(html):
+    """Compacta el CSS de los bloques <style> (sin comentarios ni espacios sobrantes)"""
+    def compactar(m):
+        css = _RE_ESPACIOS_CSS.sub(' ', _RE_COMENTARIOS_CSS.sub('', m.group(2)))
+        css = _RE_SEPARADORES_CSS.sub(r'\1', css).replace(';}', '}')
+        return m.group(1) + css.strip() + m.group(3)
+    return _RE_BLOQUE_ESTILOS.sub(compactar, html)
+
+
+# Secciones estáticas del reporte HTML (cabecera con estilos, metodología y pie);
+# se construyen una sola vez al importar el módulo
+_HTML_HEAD_GRADIENTE = _minificar_estilos("""\
+<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Análisis Científico de Gradiente SL-K - Metodología Hack (1973)</title>
+    <script src="https://cdn.plot.ly/plotly-basic-2.35.2.min.js"></script>
+    <style>
+        body {
+            font-family: 'Georgia', 'Times New Roman', serif;
+            line-height: 1.7;
+            margin: 0;
+            padding: 20px;
+            background-color: #fafafa;
+            color: #333;
+        }
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background-color: white;
+            padding: 40px;
+            border-radius: 8px;
+            box-shadow: 0 4px 20px rgba(0,0,0,0.08);
+        }
+        .header {
+            text-align: center;
+            border-bottom: 3px solid #2E86AB;
+            padding-bottom: 25px;
+            margin-bottom: 40px;
+        }
+        .header h1 {
+            color: #2E86AB;
+            margin: 0;
+            font-size: 2.2em;
+            font-weight: 600;
+        }
+        .methodology-badge {
+            background: linear-gradient(135deg, #2E86AB, #A23B72);
+            color: white;
+            padding: 8px 20px;
+            border-radius: 25px;
+            font-size: 0.95em;
+            display: inline-block;
+            margin-top: 15px;
+            font-weight: 500;
+        }
+        .section {
+            margin: 35px 0;
+            padding: 25px;
+            background: linear-gradient(135deg, #f8f9fa, #ffffff);
+            border-radius: 10px;
+            border-left: 5px solid #2E86AB;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.04);
+        }
+        .section h2 {
+            color: #2E86AB;
+            margin-top: 0;
+            font-size: 1.4em;
+            font-weight: 600;
+        }
+        .stats-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
+            gap: 20px;
+            margin: 25px 0;
+        }
+        .stat-card {
+            background: white;
+            padding: 20px;
+            border-radius: 10px;
+            border-left: 4px solid #A23B72;
+            box-shadow: 0 3px 12px rgba(0,0,0,0.08);
+            transition: transform 0.2s ease;
+        }
+        .stat-card:hover {
+            transform: translateY(-2px);
+        }
+        .stat-value {
+            font-size: 1.8em;
+            font-weight: bold;
+            color: #2E86AB;
+            margin: 0;
+            font-family: 'Monaco', monospace;
+        }
+        .stat-label {
+            color: #555;
+            margin: 8px 0 0 0;
+            font-size: 0.9em;
+            font-weight: 500;
+        }
+        .stat-sublabel {
+            color: #888;
+            font-size: 0.8em;
+            margin-top: 4px;
+        }
+        .formula {
+            background: #f8f9fa;
+            padding: 15px;
+            border-radius: 6px;
+            font-family: 'Monaco', monospace;
+            text-align: center;
+            font-size: 1.1em;
+            margin: 15px 0;
+            border: 1px solid #dee2e6;
+        }
+        .reference {
+            background: #fff3cd;
+            padding: 20px;
+            border-radius: 8px;
+            border-left: 4px solid #ffc107;
+            margin: 20px 0;
+            font-style: italic;
+        }
+        .quality-indicator {
+            display: inline-block;
+            padding: 4px 12px;
+            border-radius: 15px;
+            font-size: 0.8em;
+            font-weight: 600;
+            margin-left: 10px;
+        }
+        .quality-excelente { background: #d4edda; color: #155724; }
+        .quality-buena { background: #fff3cd; color: #856404; }
+        .quality-regular { background: #f8d7da; color: #721c24; }
+    </style>
+</head>""")
+
+_SECCION_METODOLOGIA_HACK_HTML = """\
+<div class="section">
+    <h2>Metodología Científica Aplicada</h2>
+    <p><strong>Índice de Gradiente Longitudinal (SL)</strong> según Hack (1973): Herramienta geomorfométrica para detectar anomalías tectónicas, cambios litológicos y procesos erosivos activos en perfiles longitudinales de ríos.</p>
+
+    <div class="formula">
+        SL = (ΔH/ΔL) × L
+    </div>
+
+    <p><strong>Donde:</strong></p>
+    <ul>
+        <li><strong>ΔH:</strong> Diferencia de elevación entre puntos consecutivos</li>
+        <li><strong>ΔL:</strong> Distancia 3D real del segmento</li>
+        <li><strong>L:</strong> Distancia desde la cabecera hasta el punto medio del segmento</li>
+    </ul>
+
+    <div class="reference">
+        <strong>Referencia científica:</strong> Hack, J.T. (1973). Stream-profile analysis and stream-gradient index. Journal of Research of the U.S. Geological Survey, 1(4), 421-429.
+    </div>
+</div>"""
+
+_PIE_REPORTE_GRADIENTE_HTML = """\
+<div style="text-align: center; margin-top: 40px; padding-top: 20px; border-top: 2px solid #dee2e6; color: #666; font-size: 0.9em;">
+    <p><strong>Reporte Científico V3.0 - Plugin de Análisis Geomorfológico</strong></p>
+    <p>Universidad Técnica Particular de Loja - Metodología Hack (1973) Corregida</p>
+</div>"""
+
+# Configuración de Plotly del gráfico del reporte, serializada una sola vez
+_CONFIG_PLOTLY_GRADIENTE = json.dumps({
+    "displayModeBar": True,
+    "displaylogo": False,
+    "toImageButtonOptions": {
+        "format": "png",
+        "filename": "gradiente_slk_hack_1973",
+        "height": 600,
+        "width": 1200,
+        "scale": 2
+    }
+}, separators=(',', ':'))
+
+# Plantilla del reporte HTML de gradiente; se analiza una sola vez al importar
+# el módulo y en cada reporte solo se sustituyen los valores dinámicos. Se divide
+# donde van las series de datos para escribirlas por partes
+_PLANTILLA_REPORTE_GRADIENTE_INICIO, _PLANTILLA_REPORTE_GRADIENTE_FIN = (string.Template(parte) for parte in (_HTML_HEAD_GRADIENTE + """
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Análisis Geomorfológico del Índice de Gradiente Longitudinal</h1>
+            <div class="methodology-badge">Metodología Hack (1973)</div>
+            <p style="margin-top: 15px; font-size: 1.1em;">Universidad Técnica Particular de Loja - UTPL</p>
+            <p>Fecha de análisis: $fecha_analisis</p>
+        </div>
+
+        """ + _SECCION_METODOLOGIA_HACK_HTML + """
+
+        <div class="section">
+            <h2>Estadísticas del Análisis $indicador_calidad</h2>
+            <div class="stats-grid">
+                <div class="stat-card">
+                    <p class="stat-value">$n_puntos</p>
+                    <p class="stat-label">Puntos Analizados</p>
+                    <p class="stat-sublabel">$n_segmentos segmentos de río</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$distancia_total_3d m</p>
+                    <p class="stat-label">Distancia Total 3D</p>
+                    <p class="stat-sublabel">Siguiendo perfil real del cauce</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$slk_mediana</p>
+                    <p class="stat-label">SL-K Mediana</p>
+                    <p class="stat-sublabel">Valor central robusto</p>
+                </div>
+                <div class="stat-card">
+                    <p class="stat-value">$porcentaje_validez%</p>
+                    <p class="stat-label">Validez de Datos</p>
+                    <p class="stat-sublabel">Control de calidad</p>
+                </div>
+            </div>
+        </div>
+
+        <div class="section">
+            <h2>Gráfico Científico Interactivo</h2>
+            <div id="grafico-gradiente" style="width:100%;height:600px;"></div>
+            <p style="text-align: center; margin-top: 15px; color: #666; font-style: italic;">
+                Gráfico del perfil longitudinal y gradiente SL-K según metodología de Hack (1973)
+            </p>
+        </div>
+
+        <div class="section">
+            <h2>Interpretación Geomorfológica</h2>
+            $interpretacion
+        </div>
+
+        """ + _PIE_REPORTE_GRADIENTE_HTML + """
+    </div>
+
+    <script>
+        // Series del reporte en un solo objeto JSON
+        var D = $datos;
+
+        // Datos del perfil longitudinal
+        var perfil = {
+            x: D.distancias,
+            y: D.elevaciones,
+            name: 'Perfil Longitudinal del Río',
+            type: 'scatter',
+            mode: 'lines+markers',
+            line: {color: '#2E86AB', width: 3},
+            marker: {size: 4, color: '#2E86AB'},
+            yaxis: 'y1',
+            hovertemplate: 'Distancia: %{x:.1f} m<br>Elevación: %{y:.1f} m<extra></extra>'
+        };
+
+        // Datos del gradiente SL-K
+        var gradiente = {
+            x: D.distancias,
+            y: D.gradientes,
+            name: 'Índice SL-K (Hack 1973)',
+            type: 'scatter',
+            mode: 'lines+markers',
+            line: {color: '#A23B72', width: 2},
+            marker: {size: 3, color: '#A23B72'},
+            yaxis: 'y2',
+            hovertemplate: 'Distancia: %{x:.1f} m<br>SL-K: %{y:.6f}<extra></extra>'
+        };
+
+        var layout = {
+            title: {
+                text: 'Perfil Longitudinal y Gradiente SL-K (Hack 1973)<br><sub>Universidad Técnica Particular de Loja - UTPL</sub>',
+                font: {size: 16, color: '#2E86AB'}
+            },
+            xaxis: {
+                title: 'Distancia desde Cabecera (m)',
+                showgrid: true,
+                gridcolor: '#f0f0f0'
+            },
+            yaxis: {
+                title: 'Elevación (m)',
+                titlefont: {color: '#2E86AB'},
+                tickfont: {color: '#2E86AB'},
+                side: 'left'
+            },
+            yaxis2: {
+                title: 'Índice SL-K',
+                titlefont: {color: '#A23B72'},
+                tickfont: {color: '#A23B72'},
+                overlaying: 'y',
+                side: 'right'
+            },
+            hovermode: 'x unified',
+            showlegend: true,
+            legend: {
+                x: 0.02,
+                y: 0.98,
+                bgcolor: 'rgba(255,255,255,0.9)',
+                bordercolor: '#ccc',
+                borderwidth: 1
+            },
+            plot_bgcolor: '#fafafa',
+            paper_bgcolor: 'white'
+        };
+
+        var config = """ + _CONFIG_PLOTLY_GRADIENTE + """;
+
+        Plotly.newPlot('grafico-gradiente', [perfil, gradiente], layout, config);
+    </script>
+</body>
+</html>
+""").split("$datos"))
+
+# Codificador JSON compacto de las series del reporte (escritura incremental)
+_CODIFICADOR_JSON_GRADIENTE = json.JSONEncoder(separators=(',', ':'))
+
 class GradienteAlgorithm(QgsProcessingAlgorithm):
     """
     Algoritmo corregido para cálculo del índice de gradiente longitudinal SL-K
@@ -97,10 +427,13 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         """Algoritmo principal con metodología corregida"""
         
         # ===== MARCADORES DE VERSIÓN =====
-        feedback.pushInfo("=" * 80)
+        feedback.pushInfo(_SEPARADOR_ENCABEZADO)
         feedback.pushInfo("🔬 ANÁLISIS DE GRADIENTE SL-K - METODOLOGÍA HACK (1973)")
         feedback.pushInfo("📊 Universidad Técnica Particular de Loja - UTPL")
-        feedback.pushInfo("=" * 80)
+        feedback.pushInfo(_SEPARADOR_ENCABEZADO)
+        
+        # Marca de tiempo única de la ejecución (nombre de capa, estadísticas y reporte)
+        inicio = datetime.now()
         
         try:
             # Obtener parámetros
@@ -138,14 +471,18 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
             
             feedback.pushInfo(f"📐 Procesando {len(puntos_data)} puntos ordenados espacialmente...")
             
-            # PASO 2: Validar continuidad espacial
-            self._validar_continuidad_espacial(puntos_data, feedback)
+            # Coordenadas en arreglos contiguos para los cálculos; la lista de
+            # puntos solo se conserva para escribir las features
+            xs, ys, zs = self._coordenadas_como_arreglos(puntos_data)
             
-            # PASO 3: Calcular distancias 3D acumuladas
-            distancias = self._calcular_distancias_3d_acumuladas(puntos_data, feedback)
+            # PASO 2: Calcular distancias 3D acumuladas
+            distancias = self._calcular_distancias_3d_acumuladas(xs, ys, zs, feedback)
+            
+            # PASO 3: Validar continuidad espacial (reutiliza los segmentos 3D)
+            self._validar_continuidad_espacial(puntos_data, distancias, feedback)
             
             # PASO 4: Calcular gradientes SL-K con fórmula de Hack (1973)
-            gradientes_slk = self._calcular_gradiente_slk_hack(puntos_data, distancias, feedback)
+            gradientes_slk = self._calcular_gradiente_slk_hack(zs, distancias, feedback)
             
             # PASO 5: Filtrar anomalías si se solicita
             if filtrar_anomalias:
@@ -166,7 +503,7 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
             fields.append(QgsField("VALIDADO", QVariant.String, "string", 10, 0))
             
             # PASO 8: Crear sink con nombre personalizado
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            timestamp = inicio.strftime(_FORMATO_MARCA_ARCHIVO)
             layer_name = f"gradiente_slk_{timestamp}"
             
             (sink, dest_id) = self.parameterAsSink(
@@ -178,37 +515,36 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
             
             # PASO 9: Escribir features al sink
             features_exitosas = self._escribir_features_al_sink(
-                sink, puntos_data, distancias, gradientes_slk, 
+                sink, puntos_data, zs, distancias, gradientes_slk, 
                 puntos_medios, gradientes_normalizados, puntos_layer, fields, feedback
             )
             
             # PASO 10: Calcular estadísticas científicas
             estadisticas = self._calcular_estadisticas_cientificas(
-                gradientes_slk, distancias, puntos_data, feedback
+                gradientes_slk, distancias, zs, feedback, inicio
             )
             
             # PASO 11: Generar reporte HTML científico si se solicita
             if generar_html:
                 feedback.pushInfo("📄 Generando reporte científico HTML...")
                 self._generar_reporte_cientifico_html(
-                    puntos_data, distancias, gradientes_slk, estadisticas, feedback
+                    zs, distancias, gradientes_slk, estadisticas, feedback, inicio
                 )
             
             # PASO 12: Mostrar estadísticas en log
             self._mostrar_estadisticas(estadisticas, feedback)
             
-            feedback.pushInfo("=" * 80)
+            feedback.pushInfo(_SEPARADOR_ENCABEZADO)
             feedback.pushInfo("🎉 PROCESAMIENTO COMPLETADO EXITOSAMENTE")
             feedback.pushInfo(f"📊 Puntos procesados: {len(puntos_data)}")
             feedback.pushInfo(f"📁 Capa creada: {layer_name}")
             feedback.pushInfo("📚 Metodología: Hack (1973)")
-            feedback.pushInfo("=" * 80)
+            feedback.pushInfo(_SEPARADOR_ENCABEZADO)
             
             return {self.OUTPUT_SHAPEFILE: dest_id}
             
         except Exception as e:
             feedback.reportError(f"❌ Error durante el procesamiento: {str(e)}")
-            import traceback
             feedback.pushInfo(f"🔧 DEBUG: Traceback: {traceback.format_exc()}")
             return {}
     
@@ -238,11 +574,17 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         
         feedback.pushInfo("📊 Leyendo puntos con metodología espacial...")
         
+        # Resolver índices de campos una sola vez
+        campos = layer.fields()
+        ix, iy, iz = (campos.indexFromName(c) for c in (campo_x, campo_y, campo_z))
+        io = campos.indexFromName('orden')
+        
         for feature in layer.getFeatures():
             try:
-                x_val = feature[campo_x]
-                y_val = feature[campo_y]
-                z_val = feature[campo_z]
+                attrs = feature.attributes()
+                x_val = attrs[ix]
+                y_val = attrs[iy]
+                z_val = attrs[iz]
                 
                 if x_val is None or y_val is None or z_val is None:
                     feedback.pushWarning(f"Feature {feature.id()} tiene valores nulos, saltando...")
@@ -256,13 +598,17 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
                     feedback.pushWarning(f"Feature {feature.id()} tiene valores inválidos, saltando...")
                     continue
                 
-                puntos.append({
+                punto = {
                     'x': x, 
                     'y': y, 
                     'z': z, 
                     'feature': feature,
+                    'atributos': attrs,
                     'id': feature.id()
-                })
+                }
+                if io >= 0:
+                    punto['orden'] = attrs[io]
+                puntos.append(punto)
                 
             except (ValueError, TypeError) as e:
                 feedback.reportError(f"Error leyendo coordenadas en feature {feature.id()}: {e}")
@@ -290,51 +636,42 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         feedback.pushInfo("🔄 Aplicando ordenamiento espacial por flujo del río...")
         
         # Estrategia 1: Detectar si hay campo de orden
-        if puntos and 'orden' in puntos[0]['feature'].fields().names():
+        if puntos and 'orden' in puntos[0]:
             feedback.pushInfo("📋 Usando campo 'orden' existente")
-            return sorted(puntos, key=lambda p: p['feature']['orden'])
+            return sorted(puntos, key=lambda p: p['orden'])
+        
+        # Coordenadas como arreglos para evaluar todas las distancias de cada paso a la vez
+        xs, ys, zs = self._coordenadas_como_arreglos(puntos)
         
         # Estrategia 2: Identificar cabecera (punto más alto)
-        punto_cabecera = max(puntos, key=lambda p: p['z'])
-        feedback.pushInfo(f"🏔️ Cabecera identificada en elevación {punto_cabecera['z']:.2f} m")
+        actual = int(np.argmax(zs))
+        feedback.pushInfo(f"🏔️ Cabecera identificada en elevación {zs[actual]:.2f} m")
         
         # Estrategia 3: Algoritmo de vecino más cercano desde cabecera
-        puntos_ordenados = []
-        puntos_restantes = puntos.copy()
-        
-        # Comenzar desde la cabecera
-        punto_actual = punto_cabecera
-        puntos_ordenados.append(punto_actual)
-        puntos_restantes.remove(punto_actual)
+        orden = [actual]
+        usados = np.zeros(len(puntos), dtype=bool)
+        usados[actual] = True
         
         # Ordenar por vecino más cercano siguiendo descenso topográfico
-        while puntos_restantes:
-            # Calcular distancias a puntos restantes
-            distancias = []
-            for punto in puntos_restantes:
-                dist_horizontal = math.sqrt(
-                    (punto['x'] - punto_actual['x'])**2 + 
-                    (punto['y'] - punto_actual['y'])**2
-                )
-                
-                # Penalizar ascensos (flujo debe descender)
-                diferencia_elevacion = punto['z'] - punto_actual['z']
-                if diferencia_elevacion > 0:
-                    # Penalizar ascensos con factor 3
-                    dist_corregida = dist_horizontal * 3.0
-                else:
-                    # Favorecer descensos
-                    dist_corregida = dist_horizontal
-                
-                distancias.append((dist_corregida, punto))
+        for _ in range(len(puntos) - 1):
+            # Distancias horizontales a todos los puntos
+            dx = xs - xs[actual]
+            dy = ys - ys[actual]
+            distancias = np.sqrt(dx * dx + dy * dy)
+            
+            # Penalizar ascensos con factor 3 (el flujo debe descender)
+            distancias[zs > zs[actual]] *= 3.0
             
-            # Seleccionar el punto más cercano (considerando descenso)
-            distancias.sort(key=lambda x: x[0])
-            punto_siguiente = distancias[0][1]
+            # Excluir los puntos ya ordenados
+            distancias[usados] = np.inf
             
-            puntos_ordenados.append(punto_siguiente)
-            puntos_restantes.remove(punto_siguiente)
-            punto_actual = punto_siguiente
+            # Seleccionar el punto más cercano (considerando descenso); argmin
+            # devuelve el primero en caso de empate, como el ordenamiento estable
+            actual = int(np.argmin(distancias))
+            usados[actual] = True
+            orden.append(actual)
+        
+        puntos_ordenados = [puntos[i] for i in orden]
         
         feedback.pushInfo(f"✅ Puntos ordenados espacialmente: {len(puntos_ordenados)}")
         
@@ -343,6 +680,15 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         
         return puntos_ordenados
 
+    def _coordenadas_como_arreglos(self, puntos):
+        """
+        Extrae las coordenadas X, Y, Z de la lista de puntos como arreglos float64
+        """
+        xs = np.fromiter((p['x'] for p in puntos), dtype=np.float64, count=len(puntos))
+        ys = np.fromiter((p['y'] for p in puntos), dtype=np.float64, count=len(puntos))
+        zs = np.fromiter((p['z'] for p in puntos), dtype=np.float64, count=len(puntos))
+        return xs, ys, zs
+
     def _validar_ordenamiento_espacial(self, puntos_ordenados, feedback):
         """
         Valida que el ordenamiento espacial sea coherente
@@ -380,52 +726,29 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         else:
             feedback.pushInfo(f"✅ Ordenamiento espacial validado correctamente")
 
-    def _validar_continuidad_espacial(self, puntos_data, feedback):
+    def _validar_continuidad_espacial(self, puntos_data, distancias, feedback):
         """
         Valida la continuidad espacial de los puntos del río
         NUEVA FUNCIÓN: Implementa validación de continuidad según mejores prácticas
         """
         feedback.pushInfo("🔍 V3.0: Validando continuidad espacial del perfil...")
         
-        discontinuidades = []
         threshold_distancia = 1000  # metros
         
-        for i in range(len(puntos_data) - 1):
-            p1 = puntos_data[i]
-            p2 = puntos_data[i + 1]
-            
-            # Calcular distancia 3D entre puntos consecutivos
-            dist_3d = self._calcular_distancia_3d_entre_puntos(p1, p2)
-            
-            if dist_3d > threshold_distancia:
-                discontinuidades.append({
-                    'indice': i,
-                    'distancia': dist_3d,
-                    'punto1': p1['id'],
-                    'punto2': p2['id']
-                })
-        
-        if discontinuidades:
-            feedback.pushWarning(f"⚠️ V3.0: Detectadas {len(discontinuidades)} discontinuidades espaciales")
-            for disc in discontinuidades[:3]:  # Mostrar solo las primeras 3
+        # Distancia 3D entre puntos consecutivos: diferencias de la distancia acumulada
+        segmentos_3d = np.diff(distancias)
+        discontinuidades = np.flatnonzero(segmentos_3d > threshold_distancia)
+        
+        if discontinuidades.size:
+            feedback.pushWarning(f"⚠️ V3.0: Detectadas {discontinuidades.size} discontinuidades espaciales")
+            for i in discontinuidades[:3].tolist():  # Mostrar solo las primeras 3
                 feedback.pushWarning(
-                    f"   Discontinuidad: {disc['distancia']:.0f}m entre puntos {disc['punto1']}-{disc['punto2']}"
+                    f"   Discontinuidad: {segmentos_3d[i]:.0f}m entre puntos {puntos_data[i]['id']}-{puntos_data[i + 1]['id']}"
                 )
         else:
             feedback.pushInfo("✅ V3.0: Continuidad espacial validada correctamente")
 
-    def _calcular_distancia_3d_entre_puntos(self, p1, p2):
-        """
-        Calcula la distancia 3D real entre dos puntos
-        NUEVA FUNCIÓN: Implementa cálculo de distancia 3D real
-        """
-        dx = p2['x'] - p1['x']
-        dy = p2['y'] - p1['y'] 
-        dz = p2['z'] - p1['z']
-        
-        return math.sqrt(dx**2 + dy**2 + dz**2)
-
-    def _calcular_distancias_3d_acumuladas(self, puntos_data, feedback):
+    def _calcular_distancias_3d_acumuladas(self, xs, ys, zs, feedback):
         """
         Calcula las distancias 3D acumuladas siguiendo el perfil real del río
         CORREGIDO: Implementa distancia 3D en lugar de solo horizontal
@@ -433,33 +756,24 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         """
         feedback.pushInfo("📏 V3.0: Calculando distancias 3D acumuladas...")
         
-        distancias = [0.0]
-        distancia_total_horizontal = 0.0
-        distancia_total_3d = 0.0
+        # Segmentos entre puntos consecutivos calculados a la vez sobre un arreglo (N, 3)
+        coords = np.column_stack((xs, ys, zs))
+        deltas = np.diff(coords, axis=0)
+        segmentos_3d = np.sqrt(np.einsum('ij,ij->i', deltas, deltas))
+        segmentos_horizontal = np.hypot(deltas[:, 0], deltas[:, 1])
         
-        for i in range(1, len(puntos_data)):
-            p1 = puntos_data[i-1]
-            p2 = puntos_data[i]
-            
-            # Calcular distancia 3D real
-            dist_3d = self._calcular_distancia_3d_entre_puntos(p1, p2)
-            
-            # Calcular también distancia horizontal para comparación
-            dx = p2['x'] - p1['x']
-            dy = p2['y'] - p1['y']
-            dist_horizontal = math.sqrt(dx**2 + dy**2)
-            
-            # Validar distancia mínima
-            if dist_3d < 1e-6:
-                feedback.pushWarning(f"⚠️ V3.0: Puntos muy cercanos entre índices {i-1} y {i}")
-                dist_3d = 1e-6
-            
-            # Acumular distancias
-            distancia_acumulada_3d = distancias[-1] + dist_3d
-            distancias.append(distancia_acumulada_3d)
-            
-            distancia_total_horizontal += dist_horizontal
-            distancia_total_3d += dist_3d
+        # Validar distancia mínima
+        for i in np.flatnonzero(segmentos_3d < 1e-6).tolist():
+            feedback.pushWarning(f"⚠️ V3.0: Puntos muy cercanos entre índices {i} y {i+1}")
+        np.maximum(segmentos_3d, 1e-6, out=segmentos_3d)
+        
+        # Acumular distancias (la cabecera está en 0)
+        distancias = np.empty(len(coords), dtype=np.float64)
+        distancias[0] = 0.0
+        np.cumsum(segmentos_3d, out=distancias[1:])
+        
+        distancia_total_horizontal = float(segmentos_horizontal.sum())
+        distancia_total_3d = float(segmentos_3d.sum())
         
         # Estadísticas de distancias
         feedback.pushInfo(f"📐 V3.0: Distancia total horizontal: {distancia_total_horizontal:.2f} m")
@@ -484,7 +798,7 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         
         return puntos_medios
 
-    def _calcular_gradiente_slk_hack(self, puntos_data, distancias, feedback):
+    def _calcular_gradiente_slk_hack(self, elevaciones, distancias, feedback):
         """
         Calcula el gradiente SL-K usando la fórmula original de Hack (1973)
         CORREGIDO: Implementa SL = (ΔH/ΔL) × L donde L es distancia desde cabecera
@@ -493,55 +807,49 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         """
         feedback.pushInfo("📐 V3.0: Calculando gradiente SL-K con fórmula de Hack (1973)...")
         
-        gradientes = []
-        
-        for i in range(len(puntos_data) - 1):
-            # Puntos consecutivos
-            p1 = puntos_data[i]     # Punto aguas arriba
-            p2 = puntos_data[i + 1] # Punto aguas abajo
-            
-            # Diferencia de elevación (ΔH)
-            delta_h = p1['z'] - p2['z']  # Descenso positivo (cabecera hacia desembocadura)
-            
-            # Longitud del segmento (ΔL)
-            delta_l = distancias[i + 1] - distancias[i]
-            
-            # Distancia desde cabecera hasta punto medio del segmento (L)
-            L = (distancias[i] + distancias[i + 1]) / 2
-            
-            # Validar datos del segmento
-            if abs(delta_l) < 1e-6:
-                feedback.pushWarning(f"V3.0: Segmento muy corto entre puntos {i} y {i+1}")
-                gradientes.append(0.0)
-                continue
-            
-            if L < 1e-6:
-                feedback.pushWarning(f"V3.0: Distancia desde cabecera muy pequeña en punto {i}")
-                gradientes.append(0.0)
-                continue
-            
-            # Aplicar fórmula de Hack (1973): SL = (ΔH/ΔL) × L
-            pendiente_segmento = delta_h / delta_l
-            slk_valor = pendiente_segmento * L
-            
-            # Validar resultado
-            if not math.isfinite(slk_valor):
-                feedback.pushWarning(f"V3.0: Valor SL-K inválido en segmento {i}, usando 0.0")
-                slk_valor = 0.0
-            
-            gradientes.append(slk_valor)
-        
-        # Agregar valor final (mismo que penúltimo para mantener longitud)
-        if gradientes:
-            gradientes.append(gradientes[-1])
-        else:
-            gradientes.append(0.0)
+        # Todos los segmentos a la vez: punto i aguas arriba, i + 1 aguas abajo
+        distancias = np.asarray(distancias, dtype=np.float64)
+        
+        # Diferencia de elevación (ΔH), descenso positivo (cabecera hacia desembocadura)
+        delta_h = elevaciones[:-1] - elevaciones[1:]
+        
+        # Longitud del segmento (ΔL)
+        delta_l = np.diff(distancias)
+        
+        # Distancia desde cabecera hasta punto medio del segmento (L)
+        L = (distancias[:-1] + distancias[1:]) / 2
+        
+        # Validar datos de los segmentos
+        cortos = np.abs(delta_l) < 1e-6
+        cerca_cabecera = ~cortos & (L < 1e-6)
+        validos = ~(cortos | cerca_cabecera)
+        
+        # Aplicar fórmula de Hack (1973): SL = (ΔH/ΔL) × L; los segmentos no
+        # válidos quedan en 0.0. El último valor repite el penúltimo para
+        # mantener la longitud
+        gradientes = np.zeros(len(distancias), dtype=np.float64)
+        segmentos = gradientes[:-1]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            np.divide(delta_h, delta_l, out=segmentos, where=validos)
+            segmentos *= L
+        invalidos = ~np.isfinite(segmentos)
+        segmentos[invalidos] = 0.0
+        if len(gradientes) > 1:
+            gradientes[-1] = gradientes[-2]
+        
+        # Un aviso por tipo de problema en lugar de uno por segmento
+        if cortos.any():
+            feedback.pushWarning(f"V3.0: {int(cortos.sum())} segmentos muy cortos, SL-K = 0.0")
+        if cerca_cabecera.any():
+            feedback.pushWarning(f"V3.0: {int(cerca_cabecera.sum())} segmentos con distancia desde cabecera muy pequeña, SL-K = 0.0")
+        if invalidos.any():
+            feedback.pushWarning(f"V3.0: {int(invalidos.sum())} valores SL-K inválidos, usando 0.0")
         
         # Estadísticas básicas
-        valores_validos = [g for g in gradientes if math.isfinite(g) and abs(g) > 1e-10]
-        if valores_validos:
-            feedback.pushInfo(f"📊 V3.0: SL-K calculado - Min: {min(valores_validos):.6f}, Max: {max(valores_validos):.6f}")
-            feedback.pushInfo(f"📊 V3.0: Valores válidos: {len(valores_validos)}/{len(gradientes)}")
+        valores_validos = gradientes[np.abs(gradientes) > 1e-10]
+        if valores_validos.size:
+            feedback.pushInfo(f"📊 V3.0: SL-K calculado - Min: {valores_validos.min():.6f}, Max: {valores_validos.max():.6f}")
+            feedback.pushInfo(f"📊 V3.0: Valores válidos: {valores_validos.size}/{len(gradientes)}")
         
         return gradientes
 
@@ -553,18 +861,16 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         feedback.pushInfo("🔍 V3.0: Aplicando filtrado estadístico de anomalías...")
         
         # Obtener valores válidos para análisis estadístico
-        valores_originales = [g for g in gradientes_slk if math.isfinite(g) and abs(g) > 1e-10]
+        gradientes = np.asarray(gradientes_slk, dtype=np.float64)
+        validos = np.isfinite(gradientes) & (np.abs(gradientes) > 1e-10)
+        valores_np = gradientes[validos]
         
-        if len(valores_originales) < 5:
+        if valores_np.size < 5:
             feedback.pushWarning("V3.0: Insuficientes valores válidos para filtrado estadístico")
             return gradientes_slk
         
-        # Calcular estadísticas robustas
-        valores_np = np.array(valores_originales)
-        
         # Usar percentiles para estadísticas robustas
-        q25 = np.percentile(valores_np, 25)
-        q75 = np.percentile(valores_np, 75)
+        q25, q75 = np.percentile(valores_np, (25, 75))
         iqr = q75 - q25
         mediana = np.median(valores_np)
         
@@ -580,30 +886,20 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         feedback.pushInfo(f"📊 V3.0: Límites estadísticos - IQR: [{limite_inferior:.6f}, {limite_superior:.6f}]")
         feedback.pushInfo(f"📊 V3.0: Límites extremos - 3×IQR: [{limite_extremo_inf:.6f}, {limite_extremo_sup:.6f}]")
         
-        # Filtrar gradientes
-        gradientes_filtrados = []
-        anomalias_detectadas = 0
-        anomalias_extremas = 0
-        
-        for i, valor in enumerate(gradientes_slk):
-            if not math.isfinite(valor) or abs(valor) <= 1e-10:
-                # Mantener valores nulos/cero como están
-                gradientes_filtrados.append(valor)
-            elif valor < limite_extremo_inf or valor > limite_extremo_sup:
-                # Anomalías extremas: reemplazar con mediana
-                gradientes_filtrados.append(mediana)
-                anomalias_extremas += 1
-            elif valor < limite_inferior or valor > limite_superior:
-                # Anomalías moderadas: suavizar hacia percentiles
-                if valor < limite_inferior:
-                    valor_suavizado = q25
-                else:
-                    valor_suavizado = q75
-                gradientes_filtrados.append(valor_suavizado)
-                anomalias_detectadas += 1
-            else:
-                # Valor dentro de rango normal
-                gradientes_filtrados.append(valor)
+        # Clasificar todos los valores con máscaras; los nulos/cero y no finitos
+        # se mantienen como están
+        extremas = validos & ((gradientes < limite_extremo_inf) | (gradientes > limite_extremo_sup))
+        moderadas_inf = validos & ~extremas & (gradientes < limite_inferior)
+        moderadas_sup = validos & ~extremas & (gradientes > limite_superior)
+        
+        # Anomalías extremas: reemplazar con mediana; moderadas: suavizar hacia percentiles
+        gradientes_filtrados = gradientes.copy()
+        gradientes_filtrados[extremas] = mediana
+        gradientes_filtrados[moderadas_inf] = q25
+        gradientes_filtrados[moderadas_sup] = q75
+        
+        anomalias_extremas = int(np.count_nonzero(extremas))
+        anomalias_detectadas = int(np.count_nonzero(moderadas_inf) + np.count_nonzero(moderadas_sup))
         
         if anomalias_detectadas > 0 or anomalias_extremas > 0:
             feedback.pushInfo(f"🔧 V3.0: Anomalías corregidas - Moderadas: {anomalias_detectadas}, Extremas: {anomalias_extremas}")
@@ -642,124 +938,159 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         
         return gradientes_norm
 
-    def _escribir_features_al_sink(self, sink, puntos_data, distancias, gradientes_slk, 
+    def _escribir_features_al_sink(self, sink, puntos_data, elevaciones, distancias, gradientes_slk, 
                                            puntos_medios, gradientes_norm, input_layer, fields, feedback):
         """
         Escribe las features al sink con campos validados
         """
         feedback.pushInfo("✍️ Escribiendo datos al sink...")
         
+        # Columnas calculadas de una sola vez; los valores no finitos se escriben como 0.0
+        slk = self._columna_finita(gradientes_slk)
+        dist_3d = self._columna_finita(distancias)
+        dist_cabec = self._columna_finita(puntos_medios)
+        slk_norm = self._columna_finita(gradientes_norm)
+        
+        # Pendiente en porcentaje de cada segmento; el último punto queda en 0.0
+        delta_h = elevaciones[:-1] - elevaciones[1:]
+        delta_l = np.diff(np.asarray(distancias, dtype=np.float64))
+        segmento_valido = np.abs(delta_l) > 1e-6
+        pendiente_pct = np.zeros(len(elevaciones), dtype=np.float64)
+        pendiente_pct[:-1] = np.abs(delta_h / np.where(segmento_valido, delta_l, 1.0)) * 100
+        pendiente_pct[:-1][~segmento_valido] = 0.0
+        
+        # Estado de validación según el valor SL-K
+        estado_validacion = np.where(
+            np.abs(slk) < 1e-10, "NULO", np.where(np.abs(slk) > 1000, "ANOMALO", "VALIDO")
+        )
+        
+        columnas = zip(
+            slk.tolist(), dist_3d.tolist(), dist_cabec.tolist(), slk_norm.tolist(),
+            pendiente_pct.tolist(), estado_validacion.tolist()
+        )
+        
+        # Posición de cada campo calculado en la capa de salida; si la entrada ya
+        # tenía un campo con ese nombre (p. ej. al procesar una salida previa),
+        # QgsFields.append no lo duplicó y se sobrescribe el existente
+        indices_calculados = [
+            fields.indexOf(nombre) for nombre in
+            ("SLK_HACK", "DIST_3D", "DIST_CABEC", "SLK_NORM", "ORDEN_RIO", "PENDIENTE", "VALIDADO")
+        ]
+        
+        # Lista de atributos reutilizada, siempre con la longitud de los campos de salida
+        n_originales = input_layer.fields().count()
+        atributos = [None] * fields.count()
+        
         features_exitosas = 0
-        for i, punto in enumerate(puntos_data):
+        pendientes = []
+        for i, (punto, valores) in enumerate(zip(puntos_data, columnas)):
             try:
-                new_feature = QgsFeature(fields)
-                
-                # Copiar TODOS los atributos originales
-                for field in input_layer.fields():
-                    field_name = field.name()
-                    valor_original = punto['feature'][field_name]
-                    new_feature[field_name] = valor_original
-                
-                # Calcular y validar nuevos valores con metodología Hack (1973)
-                slk_val = float(gradientes_slk[i]) if i < len(gradientes_slk) and math.isfinite(gradientes_slk[i]) else 0.0
-                dist_3d_val = float(distancias[i]) if i < len(distancias) and math.isfinite(distancias[i]) else 0.0
-                dist_cabec_val = float(puntos_medios[i]) if i < len(puntos_medios) and math.isfinite(puntos_medios[i]) else 0.0
-                slk_norm_val = float(gradientes_norm[i]) if i < len(gradientes_norm) and math.isfinite(gradientes_norm[i]) else 0.0
-                
-                # Calcular pendiente en porcentaje
-                if i < len(puntos_data) - 1:
-                    p1 = puntos_data[i]
-                    p2 = puntos_data[i + 1]
-                    delta_h = p1['z'] - p2['z']
-                    delta_l = distancias[i + 1] - distancias[i] if i + 1 < len(distancias) else 1.0
-                    pendiente_pct = abs(delta_h / delta_l) * 100 if abs(delta_l) > 1e-6 else 0.0
-                else:
-                    pendiente_pct = 0.0
-                
-                # Determinar estado de validación
-                if abs(slk_val) < 1e-10:
-                    estado_validacion = "NULO"
-                elif abs(slk_val) > 1000:
-                    estado_validacion = "ANOMALO"
-                else:
-                    estado_validacion = "VALIDO"
-                
+                slk_val, dist_3d_val, dist_cabec_val, slk_norm_val, pendiente_val, estado_val = valores
                 orden_rio = i + 1
                 
-                # Asignar valores a campos
-                new_feature["SLK_HACK"] = slk_val
-                new_feature["DIST_3D"] = dist_3d_val
-                new_feature["DIST_CABEC"] = dist_cabec_val
-                new_feature["SLK_NORM"] = slk_norm_val
-                new_feature["PENDIENTE"] = pendiente_pct
-                new_feature["ORDEN_RIO"] = orden_rio
-                new_feature["VALIDADO"] = estado_validacion
+                # Atributos originales (leídos junto con las coordenadas) y los
+                # calculados asignados en su posición
+                atributos[:n_originales] = punto['atributos']
+                valores_calculados = (
+                    slk_val, dist_3d_val, dist_cabec_val, slk_norm_val,
+                    orden_rio, pendiente_val, estado_val
+                )
+                for indice, valor in zip(indices_calculados, valores_calculados):
+                    atributos[indice] = valor
+                new_feature = QgsFeature(fields)
+                new_feature.setAttributes(atributos)
                 
                 # Copiar geometría
                 new_feature.setGeometry(punto['feature'].geometry())
                 
-                # Escribir feature al sink
-                if sink.addFeature(new_feature):
-                    features_exitosas += 1
-                else:
-                    feedback.pushWarning(f"No se pudo escribir feature {i}")
+                # Acumular y escribir al sink por lotes
+                pendientes.append(new_feature)
+                if len(pendientes) >= _TAMANO_LOTE_ESCRITURA:
+                    features_exitosas += self._volcar_lote(sink, pendientes, feedback)
                     
             except Exception as e:
                 feedback.pushWarning(f"Error en feature {i}: {str(e)}")
                 continue
         
+        features_exitosas += self._volcar_lote(sink, pendientes, feedback)
+        
         feedback.pushInfo(f"✅ Features escritas exitosamente: {features_exitosas}/{len(puntos_data)}")
         
         return features_exitosas
 
-    def _calcular_estadisticas_cientificas(self, gradientes_slk, distancias, puntos_data, feedback):
+    def _columna_finita(self, valores):
+        """
+        Copia los valores como arreglo float64 reemplazando los no finitos por 0.0
+        """
+        columna = np.array(valores, dtype=np.float64)
+        columna[~np.isfinite(columna)] = 0.0
+        return columna
+
+    def _volcar_lote(self, sink, pendientes, feedback):
+        """
+        Envía el lote pendiente al sink y lo vacía; devuelve las features escritas
+        """
+        if not pendientes:
+            return 0
+        escritas = len(pendientes)
+        if not sink.addFeatures(pendientes):
+            feedback.pushWarning(f"No se pudo escribir un lote de {escritas} features")
+            escritas = 0
+        pendientes.clear()
+        return escritas
+
+    def _calcular_estadisticas_cientificas(self, gradientes_slk, distancias, elevaciones, feedback, inicio):
         """
         Calcula estadísticas científicas completas para el reporte
         CORREGIDO: Incluye métricas estadísticas robustas y validación científica
         """
         feedback.pushInfo("📊 V3.0: Calculando estadísticas científicas...")
         
-        valores_validos = [g for g in gradientes_slk if math.isfinite(g) and abs(g) > 1e-10]
-        elevaciones = [p['z'] for p in puntos_data]
+        gradientes_np = np.asarray(gradientes_slk, dtype=np.float64)
+        valores_np = gradientes_np[np.isfinite(gradientes_np) & (np.abs(gradientes_np) > 1e-10)]
         
-        if not valores_validos:
+        if not valores_np.size:
             return {"error": "No hay gradientes válidos para análisis estadístico"}
         
-        # Estadísticas básicas
-        valores_np = np.array(valores_validos)
+        # Estadísticas básicas: cuartiles en una sola llamada, media y desviación
+        # calculadas una vez y reutilizadas
+        n_validos = int(valores_np.size)
+        slk_q25, slk_mediana, slk_q75 = np.percentile(valores_np, (25, 50, 75)).tolist()
+        slk_media = float(valores_np.mean())
+        slk_desviacion = float(valores_np.std())
         
         estadisticas = {
             # Información general
-            "n_puntos": len(puntos_data),
-            "n_segmentos": len(puntos_data) - 1,
-            "distancia_total_3d": distancias[-1] if distancias else 0,
+            "n_puntos": len(elevaciones),
+            "n_segmentos": len(elevaciones) - 1,
+            "distancia_total_3d": float(distancias[-1]) if len(distancias) else 0,
             
             # Información altimétrica
-            "elevacion_max": max(elevaciones),
-            "elevacion_min": min(elevaciones),
-            "desnivel_total": max(elevaciones) - min(elevaciones),
+            "elevacion_max": float(elevaciones.max()),
+            "elevacion_min": float(elevaciones.min()),
+            "desnivel_total": float(np.ptp(elevaciones)),
             
             # Estadísticas SL-K robustas
-            "slk_mediana": float(np.median(valores_np)),
-            "slk_media": float(np.mean(valores_np)),
-            "slk_q25": float(np.percentile(valores_np, 25)),
-            "slk_q75": float(np.percentile(valores_np, 75)),
-            "slk_iqr": float(np.percentile(valores_np, 75) - np.percentile(valores_np, 25)),
-            "slk_minimo": float(np.min(valores_np)),
-            "slk_maximo": float(np.max(valores_np)),
+            "slk_mediana": slk_mediana,
+            "slk_media": slk_media,
+            "slk_q25": slk_q25,
+            "slk_q75": slk_q75,
+            "slk_iqr": slk_q75 - slk_q25,
+            "slk_minimo": float(valores_np.min()),
+            "slk_maximo": float(valores_np.max()),
             
             # Estadísticas de dispersión
-            "slk_desviacion_std": float(np.std(valores_np)),
-            "slk_coef_variacion": float(np.std(valores_np) / np.mean(valores_np)) if np.mean(valores_np) != 0 else 0,
+            "slk_desviacion_std": slk_desviacion,
+            "slk_coef_variacion": slk_desviacion / slk_media if slk_media != 0 else 0,
             
             # Métricas de calidad
-            "puntos_validos": len(valores_validos),
-            "puntos_problematicos": len(gradientes_slk) - len(valores_validos),
-            "porcentaje_validez": (len(valores_validos) / len(gradientes_slk)) * 100,
+            "puntos_validos": n_validos,
+            "puntos_problematicos": len(gradientes_slk) - n_validos,
+            "porcentaje_validez": (n_validos / len(gradientes_slk)) * 100,
             
             # Información metodológica
             "metodologia": "Hack (1973) - Corregido V3.0",
-            "fecha_analisis": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "fecha_analisis": inicio.strftime(_FORMATO_FECHA_ANALISIS),
             "distancia_3d": True,
             "filtrado_anomalias": True
         }
@@ -772,319 +1103,80 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
         
         return estadisticas
 
-    def _generar_reporte_cientifico_html(self, puntos_data, distancias, gradientes_slk, estadisticas, feedback):
+    def _generar_reporte_cientifico_html(self, elevaciones, distancias, gradientes_slk, estadisticas, feedback, inicio):
         """
         Genera reporte HTML científico completo con metodología validada
         CORREGIDO: Incluye referencias científicas y metodología Hack (1973)
         """
+        # No generar el reporte si el usuario canceló el proceso
+        if feedback.isCanceled():
+            return
+        
+        # Sin estadísticas válidas no hay nada que reportar
+        if "error" in estadisticas:
+            feedback.pushWarning("V3.0: Sin estadísticas válidas, no se genera el reporte HTML")
+            return
+        
         try:
             feedback.pushInfo("Generando reporte HTML con metodología científica...")
             
-            # Extraer datos para gráficos científicos
-            elevaciones = [p['z'] for p in puntos_data]
-            
             # Convertir a listas simples para JSON
             distancias_list = [float(d) for d in distancias]
-            elevaciones_list = [float(e) for e in elevaciones]
+            elevaciones_list = elevaciones.tolist()
             gradientes_list = [float(g) if math.isfinite(g) else 0.0 for g in gradientes_slk]
             
-            # Crear contenido HTML científico
-            html_content = f"""
-            <!DOCTYPE html>
-            <html lang="es">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Análisis Científico de Gradiente SL-K - Metodología Hack (1973)</title>
-                <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-                <style>
-                    body {{
-                        font-family: 'Georgia', 'Times New Roman', serif;
-                        line-height: 1.7;
-                        margin: 0;
-                        padding: 20px;
-                        background-color: #fafafa;
-                        color: #333;
-                    }}
-                    .container {{
-                        max-width: 1200px;
-                        margin: 0 auto;
-                        background-color: white;
-                        padding: 40px;
-                        border-radius: 8px;
-                        box-shadow: 0 4px 20px rgba(0,0,0,0.08);
-                    }}
-                    .header {{
-                        text-align: center;
-                        border-bottom: 3px solid #2E86AB;
-                        padding-bottom: 25px;
-                        margin-bottom: 40px;
-                    }}
-                    .header h1 {{
-                        color: #2E86AB;
-                        margin: 0;
-                        font-size: 2.2em;
-                        font-weight: 600;
-                    }}
-                    .methodology-badge {{
-                        background: linear-gradient(135deg, #2E86AB, #A23B72);
-                        color: white;
-                        padding: 8px 20px;
-                        border-radius: 25px;
-                        font-size: 0.95em;
-                        display: inline-block;
-                        margin-top: 15px;
-                        font-weight: 500;
-                    }}
-                    .section {{
-                        margin: 35px 0;
-                        padding: 25px;
-                        background: linear-gradient(135deg, #f8f9fa, #ffffff);
-                        border-radius: 10px;
-                        border-left: 5px solid #2E86AB;
-                        box-shadow: 0 2px 8px rgba(0,0,0,0.04);
-                    }}
-                    .section h2 {{
-                        color: #2E86AB;
-                        margin-top: 0;
-                        font-size: 1.4em;
-                        font-weight: 600;
-                    }}
-                    .stats-grid {{
-                        display: grid;
-                        grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
-                        gap: 20px;
-                        margin: 25px 0;
-                    }}
-                    .stat-card {{
-                        background: white;
-                        padding: 20px;
-                        border-radius: 10px;
-                        border-left: 4px solid #A23B72;
-                        box-shadow: 0 3px 12px rgba(0,0,0,0.08);
-                        transition: transform 0.2s ease;
-                    }}
-                    .stat-card:hover {{
-                        transform: translateY(-2px);
-                    }}
-                    .stat-value {{
-                        font-size: 1.8em;
-                        font-weight: bold;
-                        color: #2E86AB;
-                        margin: 0;
-                        font-family: 'Monaco', monospace;
-                    }}
-                    .stat-label {{
-                        color: #555;
-                        margin: 8px 0 0 0;
-                        font-size: 0.9em;
-                        font-weight: 500;
-                    }}
-                    .stat-sublabel {{
-                        color: #888;
-                        font-size: 0.8em;
-                        margin-top: 4px;
-                    }}
-                    .formula {{
-                        background: #f8f9fa;
-                        padding: 15px;
-                        border-radius: 6px;
-                        font-family: 'Monaco', monospace;
-                        text-align: center;
-                        font-size: 1.1em;
-                        margin: 15px 0;
-                        border: 1px solid #dee2e6;
-                    }}
-                    .reference {{
-                        background: #fff3cd;
-                        padding: 20px;
-                        border-radius: 8px;
-                        border-left: 4px solid #ffc107;
-                        margin: 20px 0;
-                        font-style: italic;
-                    }}
-                    .quality-indicator {{
-                        display: inline-block;
-                        padding: 4px 12px;
-                        border-radius: 15px;
-                        font-size: 0.8em;
-                        font-weight: 600;
-                        margin-left: 10px;
-                    }}
-                    .quality-excelente {{ background: #d4edda; color: #155724; }}
-                    .quality-buena {{ background: #fff3cd; color: #856404; }}
-                    .quality-regular {{ background: #f8d7da; color: #721c24; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>Análisis Geomorfológico del Índice de Gradiente Longitudinal</h1>
-                        <div class="methodology-badge">Metodología Hack (1973)</div>
-                        <p style="margin-top: 15px; font-size: 1.1em;">Universidad Técnica Particular de Loja - UTPL</p>
-                        <p>Fecha de análisis: {estadisticas.get('fecha_analisis', 'N/A')}</p>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>Metodología Científica Aplicada</h2>
-                        <p><strong>Índice de Gradiente Longitudinal (SL)</strong> según Hack (1973): Herramienta geomorfométrica para detectar anomalías tectónicas, cambios litológicos y procesos erosivos activos en perfiles longitudinales de ríos.</p>
-                        
-                        <div class="formula">
-                            SL = (ΔH/ΔL) × L
-                        </div>
-                        
-                        <p><strong>Donde:</strong></p>
-                        <ul>
-                            <li><strong>ΔH:</strong> Diferencia de elevación entre puntos consecutivos</li>
-                            <li><strong>ΔL:</strong> Distancia 3D real del segmento</li>
-                            <li><strong>L:</strong> Distancia desde la cabecera hasta el punto medio del segmento</li>
-                        </ul>
-                        
-                        <div class="reference">
-                            <strong>Referencia científica:</strong> Hack, J.T. (1973). Stream-profile analysis and stream-gradient index. Journal of Research of the U.S. Geological Survey, 1(4), 421-429.
-                        </div>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>Estadísticas del Análisis {self._obtener_indicador_calidad(estadisticas)}</h2>
-                        <div class="stats-grid">
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('n_puntos', 0)}</p>
-                                <p class="stat-label">Puntos Analizados</p>
-                                <p class="stat-sublabel">{estadisticas.get('n_segmentos', 0)} segmentos de río</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('distancia_total_3d', 0):.1f} m</p>
-                                <p class="stat-label">Distancia Total 3D</p>
-                                <p class="stat-sublabel">Siguiendo perfil real del cauce</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('slk_mediana', 0):.6f}</p>
-                                <p class="stat-label">SL-K Mediana</p>
-                                <p class="stat-sublabel">Valor central robusto</p>
-                            </div>
-                            <div class="stat-card">
-                                <p class="stat-value">{estadisticas.get('porcentaje_validez', 0):.1f}%</p>
-                                <p class="stat-label">Validez de Datos</p>
-                                <p class="stat-sublabel">Control de calidad</p>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>Gráfico Científico Interactivo</h2>
-                        <div id="grafico-gradiente" style="width:100%;height:600px;"></div>
-                        <p style="text-align: center; margin-top: 15px; color: #666; font-style: italic;">
-                            Gráfico del perfil longitudinal y gradiente SL-K según metodología de Hack (1973)
-                        </p>
-                    </div>
-                    
-                    <div class="section">
-                        <h2>Interpretación Geomorfológica</h2>
-                        {self._generar_interpretacion_cientifica_html(estadisticas)}
-                    </div>
-                    
-                    <div style="text-align: center; margin-top: 40px; padding-top: 20px; border-top: 2px solid #dee2e6; color: #666; font-size: 0.9em;">
-                        <p><strong>Reporte Científico V3.0 - Plugin de Análisis Geomorfológico</strong></p>
-                        <p>Universidad Técnica Particular de Loja - Metodología Hack (1973) Corregida</p>
-                    </div>
-                </div>
-                
-                <script>
-                    // Datos del perfil longitudinal
-                    var perfil = {{
-                        x: {distancias_list},
-                        y: {elevaciones_list},
-                        name: 'Perfil Longitudinal del Río',
-                        type: 'scatter',
-                        mode: 'lines+markers',
-                        line: {{color: '#2E86AB', width: 3}},
-                        marker: {{size: 4, color: '#2E86AB'}},
-                        yaxis: 'y1',
-                        hovertemplate: 'Distancia: %{{x:.1f}} m<br>Elevación: %{{y:.1f}} m<extra></extra>'
-                    }};
-                    
-                    // Datos del gradiente SL-K
-                    var gradiente = {{
-                        x: {distancias_list},
-                        y: {gradientes_list},
-                        name: 'Índice SL-K (Hack 1973)',
-                        type: 'scatter',
-                        mode: 'lines+markers',
-                        line: {{color: '#A23B72', width: 2}},
-                        marker: {{size: 3, color: '#A23B72'}},
-                        yaxis: 'y2',
-                        hovertemplate: 'Distancia: %{{x:.1f}} m<br>SL-K: %{{y:.6f}}<extra></extra>'
-                    }};
-                    
-                    var layout = {{
-                        title: {{
-                            text: 'Perfil Longitudinal y Gradiente SL-K (Hack 1973)<br><sub>Universidad Técnica Particular de Loja - UTPL</sub>',
-                            font: {{size: 16, color: '#2E86AB'}}
-                        }},
-                        xaxis: {{
-                            title: 'Distancia desde Cabecera (m)',
-                            showgrid: true,
-                            gridcolor: '#f0f0f0'
-                        }},
-                        yaxis: {{
-                            title: 'Elevación (m)',
-                            titlefont: {{color: '#2E86AB'}},
-                            tickfont: {{color: '#2E86AB'}},
-                            side: 'left'
-                        }},
-                        yaxis2: {{
-                            title: 'Índice SL-K',
-                            titlefont: {{color: '#A23B72'}},
-                            tickfont: {{color: '#A23B72'}},
-                            overlaying: 'y',
-                            side: 'right'
-                        }},
-                        hovermode: 'x unified',
-                        showlegend: true,
-                        legend: {{
-                            x: 0.02,
-                            y: 0.98,
-                            bgcolor: 'rgba(255,255,255,0.9)',
-                            bordercolor: '#ccc',
-                            borderwidth: 1
-                        }},
-                        plot_bgcolor: '#fafafa',
-                        paper_bgcolor: 'white'
-                    }};
-                    
-                    var config = {{
-                        displayModeBar: true,
-                        displaylogo: false,
-                        toImageButtonOptions: {{
-                            format: 'png',
-                            filename: 'gradiente_slk_hack_1973',
-                            height: 600,
-                            width: 1200,
-                            scale: 2
-                        }}
-                    }};
-                    
-                    Plotly.newPlot('grafico-gradiente', [perfil, gradiente], layout, config);
-                </script>
-            </body>
-            </html>
-            """
+            if feedback.isCanceled():
+                return
             
-            # Guardar y abrir reporte
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            temp_dir = tempfile.gettempdir()
-            ruta_html = os.path.join(temp_dir, f"reporte_slk_hack_1973_v3_{timestamp}.html")
+            # Valores dinámicos de la plantilla
+            valores = dict(
+                fecha_analisis=estadisticas.get('fecha_analisis', 'N/A'),
+                indicador_calidad=self._obtener_indicador_calidad(estadisticas),
+                n_puntos=estadisticas.get('n_puntos', 0),
+                n_segmentos=estadisticas.get('n_segmentos', 0),
+                distancia_total_3d=f"{estadisticas.get('distancia_total_3d', 0):.1f}",
+                slk_mediana=f"{estadisticas.get('slk_mediana', 0):.6f}",
+                porcentaje_validez=f"{estadisticas.get('porcentaje_validez', 0):.1f}",
+                interpretacion=self._generar_interpretacion_cientifica_html(estadisticas)
+            )
+            datos = {
+                "distancias": distancias_list,
+                "elevaciones": elevaciones_list,
+                "gradientes": gradientes_list
+            }
             
-            with open(ruta_html, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # Importaciones diferidas: solo se usan al generar el reporte
+            import tempfile
+            import webbrowser
             
-            webbrowser.open(f"file://{ruta_html}")
+            # Nombre único por ejecución con la marca de tiempo del análisis
+            timestamp = inicio.strftime(_FORMATO_MARCA_ARCHIVO)
+            ruta_html = os.path.join(tempfile.gettempdir(), f"reporte_slk_hack_1973_v3_{timestamp}.html")
+            
+            # Escribir por partes, sin armar el documento completo en memoria; se
+            # escribe a un temporal y se renombra para no dejar reportes a medias
+            ruta_parcial = ruta_html + '.part'
+            try:
+                with open(ruta_parcial, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+                    f.writelines(self._iter_secciones_html(valores, datos))
+                os.replace(ruta_parcial, ruta_html)
+            finally:
+                # Si la escritura falló, no dejar el temporal en el directorio
+                if os.path.exists(ruta_parcial):
+                    os.remove(ruta_parcial)
             feedback.pushInfo(f"V3.0: Reporte científico generado: {ruta_html}")
+            
+            webbrowser.open(f"file://{ruta_html}")
                 
         except Exception as e:
             feedback.reportError(f"V3.0: Error generando reporte: {str(e)}")
 
+    def _iter_secciones_html(self, valores, datos):
+        """Genera las secciones del reporte HTML en orden de escritura"""
+        yield _PLANTILLA_REPORTE_GRADIENTE_INICIO.substitute(valores)
+        yield from _CODIFICADOR_JSON_GRADIENTE.iterencode(datos)
+        yield _PLANTILLA_REPORTE_GRADIENTE_FIN.substitute(valores)
+
     def _obtener_indicador_calidad(self, estadisticas):
         """Determina el indicador de calidad del análisis"""
         porcentaje_validez = estadisticas.get('porcentaje_validez', 0)
@@ -1127,15 +1219,18 @@ class GradienteAlgorithm(QgsProcessingAlgorithm):
             feedback.reportError("Error en estadísticas")
             return
         
-        feedback.pushInfo("=" * 60)
-        feedback.pushInfo("ESTADÍSTICAS CIENTÍFICAS - METODOLOGÍA HACK (1973)")
-        feedback.pushInfo("=" * 60)
-        feedback.pushInfo(f"Metodología: {estadisticas['metodologia']}")
-        feedback.pushInfo(f"Puntos: {estadisticas['n_puntos']}")
-        feedback.pushInfo(f"Distancia 3D: {estadisticas['distancia_total_3d']:.2f} m")
-        feedback.pushInfo(f"SL-K Mediana: {estadisticas['slk_mediana']:.6f}")
-        feedback.pushInfo(f"Validez: {estadisticas['porcentaje_validez']:.1f}%")
-        feedback.pushInfo("=" * 60)
+        # Un solo mensaje multilínea en lugar de una llamada a pushInfo por línea
+        feedback.pushInfo("\n".join((
+            _SEPARADOR_ESTADISTICAS,
+            "ESTADÍSTICAS CIENTÍFICAS - METODOLOGÍA HACK (1973)",
+            _SEPARADOR_ESTADISTICAS,
+            f"Metodología: {estadisticas['metodologia']}",
+            f"Puntos: {estadisticas['n_puntos']}",
+            f"Distancia 3D: {estadisticas['distancia_total_3d']:.2f} m",
+            f"SL-K Mediana: {estadisticas['slk_mediana']:.6f}",
+            f"Validez: {estadisticas['porcentaje_validez']:.1f}%",
+            _SEPARADOR_ESTADISTICAS
+        )))
 
     def name(self):
         return 'gradiente_slk_hack'